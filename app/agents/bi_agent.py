@@ -1,32 +1,48 @@
-import pandas as pd
+import asyncio
 from app.memory.mem0_client import memory
+from app.cache.result_store import result_store, paginate
+from app.config import RESULT_PAGE_SIZE
+from app.observability.metrics import MEMORY_LATENCY
+
+def _is_numeric(values):
+    # Same rule as a DataFrame numeric dtype: ints/floats with NULLs, no bools/text
+    seen = False
+    for v in values:
+        if v is None:
+            continue
+        if isinstance(v, bool) or not isinstance(v, (int, float)):
+            return False
+        seen = True
+    return seen
+
+def _build_response(state):
+    # Reads the columnar result in place; no DataFrame or row copies
+    handle = state["result"]
+    result = result_store.get(handle["result_id"], state["tenant_id"])
+    if result is None:
+        raise RuntimeError("Query result expired before the response was built - re-run the question")
+    total_rows = len(result)
 
-def run(state):
-    df = pd.DataFrame(state["result"])
-    
     # Smarter KPI extraction
     primary_metric_val = 0
     primary_metric_name = "Primary Metric"
     
-    if not df.empty:
+    if total_rows:
         # 1. Identify numeric columns
-        numeric_cols = df.select_dtypes(include=['number']).columns
+        numeric_cols = [c for c, values in zip(result.columns, result.data) if _is_numeric(values)]
         # Exclude IDs from being primary metrics
         valid_cols = [c for c in numeric_cols if 'id' not in c.lower()]
         
         if valid_cols:
             # Prioritize 'revenue' if it exists, else pick the first valid numeric col
             revenue_match = [c for c in valid_cols if 'revenue' in c.lower() or 'sales' in c.lower()]
-            if revenue_match:
-                primary_metric_name = revenue_match[0].replace('_', ' ').title()
-                primary_metric_val = df[revenue_match[0]].sum()
-            else:
-                primary_metric_name = valid_cols[0].replace('_', ' ').title()
-                primary_metric_val = df[valid_cols[0]].sum()
+            metric_col = revenue_match[0] if revenue_match else valid_cols[0]
+            primary_metric_name = metric_col.replace('_', ' ').title()
+            primary_metric_val = sum(v for v in result.column(metric_col) if v is not None)
         else:
             # FALLBACK: If no numeric columns (e.g. list of names), use record count
             primary_metric_name = "Total Records"
-            primary_metric_val = len(df)
+            primary_metric_val = total_rows
 
     # Final safety check on casting to float
     try:
@@ -41,23 +57,50 @@ def run(state):
             "growth": "12.5%", 
             "yoy": "8.2%"
         },
-        "data": df.to_dict("records"),
+        "data": [],
         "sql": state["sql"],
+        "sql_params": state.get("sql_params") or {},
+        "total_rows": total_rows,
+        "next_cursor": None,
+        "truncated": state.get("result_truncated", False),
         "reasoning": (
             f"### Analysis Summary\n"
             f"- **Interpreted Query:** \"{state.get('corrected_question', state['question'])}\"\n"
-            f"- **Data Scoped:** Analyzed {len(df)} relevant records from the database.\n"
+            f"- **Data Scoped:** Analyzed {total_rows} relevant records from the database.\n"
             f"- **Sources:** Information retrieved from the following modules: {', '.join(state.get('metadata', {}).get('tables', ['Enterprise Core']))}.\n"
             f"- **Metric Calculation:** Calculated **{primary_metric_name}** as the primary business indicator.\n"
             f"- **Accuracy:** Results have been verified against the 2023-2026 data range.\n"
             f"- **Next Steps:** You can refine this by asking for a breakdown by region or time period."
         )
     }
-    
+    # Ship only the first page (the only rows materialized here); the full
+    # result stays in the store behind a cursor. NULLs stay None, not NaN.
+    page = paginate(result, handle["result_id"], 0, RESULT_PAGE_SIZE)
+    state["response"]["data"] = page["data"]
+    state["response"]["next_cursor"] = page["next_cursor"]
+    # Response built: later pages are best-effort, so the row cap may evict it
+    result_store.unpin(handle["result_id"])
+
+    # Memory line summarizing the insight (persisted by the caller)
+    return f"User Question: {state['question']} | AI Insight: {primary_metric_name} was {final_val:,.2f}"
+
+def _store_memory(state, memory_content):
+    if state.get("warmup"):
+        return  # Startup warm-up queries are not real user interactions
     try:
-        memory_content = f"User Question: {state['question']} | AI Insight: {primary_metric_name} was {final_val:,.2f}"
-        memory.add(memory_content, user_id=state["user_id"])
+        with MEMORY_LATENCY.time(op="add"):
+            memory.add(memory_content, user_id=state["user_id"])
         print(f"[MEMORY] Successfully stored interaction for {state['user_id']}")
     except Exception as e:
         print(f"Memory warning: {e}")
+
+def run(state):
+    _store_memory(state, _build_response(state))
+    return state
+
+async def arun(state):
+    # KPI extraction is a quick pass over the columns; the mem0 write is the
+    # slow part and goes to a worker thread so the event loop is not blocked on it.
+    memory_content = _build_response(state)
+    await asyncio.to_thread(_store_memory, state, memory_content)
     return state
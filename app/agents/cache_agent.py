@@ -0,0 +1,61 @@
+from app.agents.vault import vault_match, normalize_question, vault_version
+from app.agents.execute_agent import data_version
+from app.cache.response_cache import response_cache, history_fingerprint
+from app.cache.result_store import result_store, parse_cursor
+from app.observability.tracing import annotate
+from app.config import RESPONSE_CACHE_ENABLED
+
+def request_key(state):
+    # (tenant, normalized question, history fingerprint). Vault answers ignore
+    # conversation history, so they share one key per tenant.
+    question = state["question"]
+    history_fp = "" if vault_match(state)[0] else history_fingerprint(state.get("history"))
+    return (state["tenant_id"], normalize_question(question), history_fp)
+
+def cache_key(state):
+    # A vault reload changes vault_version(), so answers built from the old
+    # certified SQL stop matching without a cache flush
+    return request_key(state) + (data_version(), vault_version())
+
+def stored_result(response, tenant_id):
+    # Full result behind a paginated response, or None if it has expired
+    parsed = parse_cursor(response["next_cursor"])
+    return result_store.get(parsed[0], tenant_id) if parsed else None
+
+def lookup(key):
+    # A cached answer is only usable while its result cursor is still live
+    cached = response_cache.get(key)
+    if cached is not None and cached.get("next_cursor") and stored_result(cached, key[0]) is None:
+        return None
+    return cached
+
+def store(state):
+    # Called after the bi node; the key was fixed before execution so a write
+    # that lands mid-request never caches old rows under the new data version
+    if state.get("cache_key") and state.get("response"):
+        response_cache.put(tuple(state["cache_key"]), state["response"], tables=state.get("metadata", {}).get("tables", []))
+    return state
+
+def check(state):
+    # Endpoint-side lookup before anything is admitted: fixes the key in
+    # state, so the graph's cache node does not repeat the lookup
+    if not RESPONSE_CACHE_ENABLED:
+        return None
+    key = cache_key(state)
+    state["cache_key"] = list(key)
+    return lookup(key)
+
+def run(state):
+    # Graph-level fast path: a valid cached response ends the run right here.
+    # Runs started by the API already did this in check().
+    if not RESPONSE_CACHE_ENABLED or state.get("cache_key"):
+        return state
+    key = cache_key(state)
+    state["cache_key"] = list(key)
+    cached = lookup(key)
+    annotate(cache_hit=cached is not None)
+    if cached is not None:
+        print(f"[CACHE] Graph fast path for: {state['question']}")
+        state["response"] = cached
+        state["cache_hit"] = True
+    return state
@@ -1,15 +1,119 @@
-from sqlalchemy import create_engine, text
+from app.config import EXECUTE_MAX_ROWS, SQLITE_PROGRESS_OPCODES
+from app.langgraph.deadline import DeadlineExceeded
+from app.observability.metrics import SQL_LATENCY, SQL_ROWS
+from app.observability.tracing import annotate
+from app.cache.result_store import ColumnarResult, result_store, handle
+import asyncio
 import os
+import time
 
 # Use Environment Variable for DB URL if available (e.g., Postgres on Vercel/Streamlit Cloud)
 # Fallback to local SQLite file for demos/local runs
 DB_URL = os.getenv("DATABASE_URL", "sqlite:///enterprise_bi_db.sqlite")
 
-engine = create_engine(DB_URL)
+_engine = None
 
-def run(state):
+def get_engine():
+    # Created on first use so importing the graph doesn't pull in SQLAlchemy
+    global _engine
+    if _engine is None:
+        from sqlalchemy import create_engine
+        _engine = create_engine(DB_URL)
+    return _engine
+
+def _sqlite_header_int(database, offset):
+    # 4-byte big-endian field of the SQLite file header, -1 if unreadable
+    try:
+        with open(database, "rb") as f:
+            f.seek(offset)
+            return int.from_bytes(f.read(4), "big")
+    except OSError:
+        return -1
+
+def _sqlite_database():
+    engine = get_engine()
+    if engine.url.get_backend_name() != "sqlite" or not engine.url.database:
+        return None
+    return engine.url.database
+
+def data_version():
+    # Cheap change token for the backing data, used in response cache keys.
+    # For SQLite we read the header's file change counter (bytes 24-27, bumped
+    # on every committed write - including writes from other processes such as
+    # the Streamlit entry form) plus the WAL file size when WAL mode is on.
+    database = _sqlite_database()
+    if database is None:
+        return "static"
+    counter = _sqlite_header_int(database, 24)
+    try:
+        wal_size = os.stat(database + "-wal").st_size
+    except OSError:
+        wal_size = 0
+    return f"{counter}:{wal_size}"
+
+def schema_version():
+    # Changes only on DDL (SQLite header schema cookie, bytes 40-43); used to
+    # key memoized router / SQL generation results
+    database = _sqlite_database()
+    return "static" if database is None else str(_sqlite_header_int(database, 40))
+
+FETCH_CHUNK_ROWS = 5000
+
+def _fetch_rows(sql, deadline=None, params=None):
+    # Returns (ColumnarResult, truncated). Rows are appended straight into
+    # per-column lists (no row dicts), and capped at EXECUTE_MAX_ROWS so a
+    # broad generated query (e.g. SELECT * FROM sales) cannot exhaust memory.
+    # params are bound to the statement's :name placeholders (vault templates).
+    from sqlalchemy import text
+    from sqlalchemy.exc import OperationalError
+    engine = get_engine()
     with engine.connect() as conn:
-        res = conn.execute(text(state["sql"]))
-        # Convert to list of dicts for easier downstream processing
-        state["result"] = [dict(row._mapping) for row in res]
+        raw = conn.connection.driver_connection
+        interruptible = deadline and engine.url.get_backend_name() == "sqlite"
+        if interruptible:
+            # SQLite calls this every N VM opcodes; non-zero aborts the statement
+            raw.set_progress_handler(lambda: 1 if time.time() > deadline else 0, SQLITE_PROGRESS_OPCODES)
+        try:
+            with SQL_LATENCY.time():
+                res = conn.execute(text(sql), params or {})
+                columns = list(res.keys())
+                data = [[] for _ in columns]
+                fetched = 0
+                while fetched <= EXECUTE_MAX_ROWS:
+                    chunk = res.fetchmany(min(FETCH_CHUNK_ROWS, EXECUTE_MAX_ROWS + 1 - fetched))
+                    if not chunk:
+                        break
+                    for values, column in zip(data, zip(*chunk)):
+                        values.extend(column)
+                    fetched += len(chunk)
+            SQL_ROWS.observe(fetched)
+            annotate(rows=min(fetched, EXECUTE_MAX_ROWS))
+        except OperationalError as e:
+            if interruptible and "interrupted" in str(e).lower():
+                raise DeadlineExceeded("execute", deadline) from e
+            raise
+        finally:
+            if interruptible:
+                raw.set_progress_handler(None, 0)
+    if fetched > EXECUTE_MAX_ROWS:
+        print(f"[EXECUTE] Result truncated to {EXECUTE_MAX_ROWS} rows")
+        for values in data:
+            del values[EXECUTE_MAX_ROWS:]
+        return ColumnarResult(columns, data, EXECUTE_MAX_ROWS), True
+    return ColumnarResult(columns, data, fetched), False
+
+def _store_result(state, result, truncated):
+    # The rows live in the result store; state only carries a small handle.
+    # Pinned until bi has built the response, so the row cap can't evict it.
+    state["result"] = handle(result_store.put(state["tenant_id"], result, pinned=True), result)
+    state["result_truncated"] = truncated
     return state
+
+def run(state):
+    return _store_result(state, *_fetch_rows(state["sql"], state.get("deadline"), state.get("sql_params")))
+
+async def arun(state):
+    # The DB driver is blocking, so the query runs on a worker thread and the
+    # event loop keeps serving other requests while SQLite works. The progress
+    # handler stops the statement itself once the deadline passes.
+    return _store_result(state, *await asyncio.to_thread(_fetch_rows, state["sql"], state.get("deadline"), state.get("sql_params")))
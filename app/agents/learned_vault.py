@@ -0,0 +1,189 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from app.agents.vault import normalize_question
+from app.config import (
+    LEARNED_VAULT_ENABLED, LEARNED_VAULT_PROMOTE_AFTER, LEARNED_VAULT_MAX_ENTRIES,
+    LEARNED_VAULT_MAX_CANDIDATES, LEARNED_VAULT_DB_PATH,
+)
+
+class LearnedVault:
+    """
+    Learned tier below the certified vault. Every LLM-generated SQL is
+    recorded per (tenant, normalized question) with how often it was
+    generated and how its executions went. Once the same SQL has run
+    successfully `promote_after` times without a failure it is promoted:
+    later lookups return it directly and skip the router and SQL LLM calls.
+
+    Candidates live in a bounded LRU. Promoted entries are capped at
+    max_entries with LFU eviction (least recently used among equal hit
+    counts), are tied to the schema version they were learned on, and are
+    demoted as soon as one of their executions fails. Promoted entries are
+    written through to SQLite so they survive restarts.
+    """
+
+    def __init__(self, promote_after, max_entries, max_candidates, db_path=None):
+        self.promote_after = promote_after
+        self.max_entries = max_entries
+        self.max_candidates = max_candidates
+        self.db_path = db_path
+        self._candidates = OrderedDict()  # key -> {sql: {"tables", "hits", "successes", "failures"}}
+        self._entries = {}  # key -> {"sql", "tables", "schema", "hits", "last_used", "promoted_at"}
+        self._lock = threading.Lock()
+        self._db = None
+        self._loaded = False
+        self.stats = {"hits": 0, "misses": 0, "promotions": 0, "demotions": 0, "evictions": 0}
+
+    def _conn(self):
+        # Opened on first use; check_same_thread=False because sync nodes run
+        # on executor threads (all access is under self._lock)
+        if self._db is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+            self._db = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS learned_vault (tenant_id TEXT, question TEXT, sql TEXT, tables TEXT, "
+                "schema TEXT, hits INTEGER, last_used REAL, promoted_at REAL, PRIMARY KEY (tenant_id, question))"
+            )
+        return self._db
+
+    def _load(self):
+        if self._loaded:
+            return
+        self._loaded = True
+        if not self.db_path:
+            return
+        try:
+            rows = self._conn().execute("SELECT tenant_id, question, sql, tables, schema, hits, last_used, promoted_at FROM learned_vault").fetchall()
+        except sqlite3.Error as e:
+            print(f"[LEARNED] Could not load {self.db_path}: {e}")
+            return
+        for tenant_id, question, sql, tables, schema, hits, last_used, promoted_at in rows:
+            self._entries[(tenant_id, question)] = {
+                "sql": sql, "tables": json.loads(tables), "schema": schema,
+                "hits": hits, "last_used": last_used, "promoted_at": promoted_at,
+            }
+        if rows:
+            print(f"[LEARNED] Loaded {len(rows)} learned questions from {self.db_path}")
+
+    def _write(self, key, entry):
+        if self.db_path:
+            db = self._conn()
+            db.execute(
+                "INSERT OR REPLACE INTO learned_vault VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key[0], key[1], entry["sql"], json.dumps(entry["tables"]), entry["schema"], entry["hits"], entry["last_used"], entry["promoted_at"]),
+            )
+            db.commit()
+
+    def _delete(self, keys):
+        if self.db_path and keys:
+            db = self._conn()
+            db.executemany("DELETE FROM learned_vault WHERE tenant_id = ? AND question = ?", keys)
+            db.commit()
+
+    def lookup(self, tenant_id, question, schema):
+        # Promoted entry for this question on the current schema, or None
+        key = (tenant_id, normalize_question(question))
+        with self._lock:
+            self._load()
+            entry = self._entries.get(key)
+            if entry is not None and entry["schema"] != schema:
+                # Learned on an older schema: drop it and let it be relearned
+                del self._entries[key]
+                self._delete([key])
+                self.stats["demotions"] += 1
+                entry = None
+            if entry is None:
+                self.stats["misses"] += 1
+                return None
+            entry["hits"] += 1
+            entry["last_used"] = time.time()
+            self.stats["hits"] += 1
+            return {"sql": entry["sql"], "tables": list(entry["tables"])}
+
+    def record(self, tenant_id, question, sql, tables, schema, ok):
+        # One execution of generated SQL; returns True when it got promoted
+        key = (tenant_id, normalize_question(question))
+        with self._lock:
+            self._load()
+            if key in self._entries:
+                # Promoted while this run was generating; failures of learned
+                # SQL arrive through demote()
+                return False
+            variants = self._candidates.pop(key, {})
+            self._candidates[key] = variants  # Most recently seen last
+            counts = variants.setdefault(sql, {"tables": list(tables), "hits": 0, "successes": 0, "failures": 0})
+            counts["hits"] += 1
+            counts["successes" if ok else "failures"] += 1
+            while len(self._candidates) > self.max_candidates:
+                self._candidates.popitem(last=False)
+            if counts["failures"] or counts["successes"] < self.promote_after:
+                return False
+
+            del self._candidates[key]
+            now = time.time()
+            entry = {"sql": sql, "tables": counts["tables"], "schema": schema, "hits": 0, "last_used": now, "promoted_at": now}
+            self._entries[key] = entry
+            self._write(key, entry)
+            self.stats["promotions"] += 1
+            self._evict(keep=key)
+        print(f"[LEARNED] Promoted after {counts['successes']} successful runs: {key[1]}")
+        return True
+
+    def demote(self, tenant_id, question, sql):
+        # A learned entry failed to execute: stop serving it. It only comes
+        # back if the LLM's SQL proves itself again from scratch.
+        key = (tenant_id, normalize_question(question))
+        with self._lock:
+            self._load()
+            entry = self._entries.get(key)
+            if entry is None or entry["sql"] != sql:
+                return False
+            del self._entries[key]
+            self._delete([key])
+            self.stats["demotions"] += 1
+        print(f"[LEARNED] Demoted after a failed run: {key[1]}")
+        return True
+
+    def _evict(self, keep):
+        # LFU: fewest hits go first, least recently used among equals. The
+        # entry just promoted has no hits yet and is spared this round.
+        excess = len(self._entries) - self.max_entries
+        if excess <= 0:
+            return
+        others = [k for k in self._entries if k != keep]
+        doomed = sorted(others, key=lambda k: (self._entries[k]["hits"], self._entries[k]["last_used"]))[:excess]
+        for key in doomed:
+            del self._entries[key]
+        self._delete(doomed)
+        self.stats["evictions"] += len(doomed)
+
+    def clear(self, tenant_id=None):
+        with self._lock:
+            self._load()
+            doomed = [k for k in self._entries if tenant_id is None or k[0] == tenant_id]
+            for key in doomed:
+                del self._entries[key]
+            self._delete(doomed)
+            for key in [k for k in self._candidates if tenant_id is None or k[0] == tenant_id]:
+                del self._candidates[key]
+            return len(doomed)
+
+    def snapshot(self):
+        with self._lock:
+            lookups = self.stats["hits"] + self.stats["misses"]
+            return {
+                "enabled": LEARNED_VAULT_ENABLED,
+                "entries": len(self._entries),
+                "candidates": len(self._candidates),
+                "promote_after": self.promote_after,
+                "max_entries": self.max_entries,
+                "disk": bool(self.db_path),
+                "hit_rate": round(self.stats["hits"] / lookups, 4) if lookups else 0.0,
+                **self.stats,
+            }
+
+learned_vault = LearnedVault(LEARNED_VAULT_PROMOTE_AFTER, LEARNED_VAULT_MAX_ENTRIES, LEARNED_VAULT_MAX_CANDIDATES, LEARNED_VAULT_DB_PATH or None)
@@ -0,0 +1,14 @@
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+def get_llm(timeout=None):
+    # Groq chat model shared by the router (metadata_agent) and sql_agent, or
+    # None without an API key. timeout (seconds) is the remaining request
+    # budget; the Groq HTTP call is aborted when it runs out
+    api_key = os.getenv("GROQ_API_KEY")
+    if not api_key or api_key == "your_groq_key":
+        return None
+    from langchain_groq import ChatGroq  # Deferred: keeps app startup light
+    return ChatGroq(model="llama-3.3-70b-versatile", timeout=timeout)
@@ -0,0 +1,38 @@
+import asyncio
+from app.memory.mem0_client import memory
+from app.observability.metrics import MEMORY_LATENCY
+from app.observability.tracing import annotate
+
+MAX_MEMORIES = 3
+
+def _memory_lines(found):
+    # mem0 returns {"results": [...]} (newer) or a bare list; keep the text only
+    if isinstance(found, dict):
+        found = found.get("results", [])
+    lines = []
+    for item in (found or [])[:MAX_MEMORIES]:
+        text = item.get("memory") if isinstance(item, dict) else item
+        if text:
+            lines.append(str(text)[:300])
+    annotate(memories=len(lines))
+    return lines
+
+def run(state):
+    # Parallel branch: returns only its own key
+    try:
+        with MEMORY_LATENCY.time(op="search"):
+            found = memory.search(state["question"], user_id=state["user_id"])
+    except Exception as e:
+        print(f"Memory warning: {e}")
+        found = []
+    return {"memory_context": _memory_lines(found)}
+
+async def arun(state):
+    # mem0 client is sync-only, keep it off the loop
+    try:
+        with MEMORY_LATENCY.time(op="search"):
+            found = await asyncio.to_thread(memory.search, state["question"], user_id=state["user_id"])
+    except Exception as e:
+        print(f"Memory warning: {e}")
+        found = []
+    return {"memory_context": _memory_lines(found)}
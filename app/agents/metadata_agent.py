@@ -1,31 +1,45 @@
-from app.memory.mem0_client import memory
-from langchain_groq import ChatGroq
-import os
-from app.agents.vault import get_vault_entry
+import json
+from app.agents.llm import get_llm
+from app.agents.vault import vault_match
+from app.agents.learned_vault import learned_vault
+from app.agents.execute_agent import schema_version
+from app.cache.node_memo import skip_memo
+from app.config import LEARNED_VAULT_ENABLED
+from app.langgraph.deadline import DeadlineExceeded, remaining, acall_llm
+from app.observability.metrics import VAULT_LOOKUPS, llm_call
+from app.observability.tracing import annotate, record_llm
 
-def run(state):
+def _learned_entry(state):
+    # Learned tier: SQL the LLM produced and that ran fine repeatedly for this
+    # tenant. Only standalone questions are learned (see sql_agent.learn).
+    if not LEARNED_VAULT_ENABLED or state.get("history"):
+        return None
+    return learned_vault.lookup(state["tenant_id"], state["question"], schema_version())
+
+def _vault_shortcut(state):
     # 0. Check Vault First (Short Circuit Groq)
-    entry = get_vault_entry(state["question"])
+    entry, match_type = vault_match(state)
+    source = "vault"
+    if entry is None:
+        entry = _learned_entry(state)
+        if entry is not None:
+            match_type, source = "learned_hit", "learned"
+    VAULT_LOOKUPS.inc(result=match_type)
+    annotate(vault=match_type)
     if entry:
         state["metadata"] = {
             "tables": entry["tables"],
             "columns": ["*"]
         }
         state["sql"] = entry["sql"] # Pre-load SQL to skip sql_agent block
-        print(f"[VAULT] Shortcut activated for: {state['question']}")
-        return state
-
-    # 1. Memory Context
-    try:
-        memory.search(state["question"], user_id=state["user_id"])
-    except Exception as e:
-        print(f"Memory warning: {e}")
+        state["sql_params"] = entry.get("params", {}) # Template slot values, bound at execution
+        state["sql_source"] = source
+        print(f"[VAULT] Shortcut activated ({match_type}) for: {state['question']}")
+        return True
+    return False
 
-    # 2. Dynamic Router LLM
-    api_key = os.getenv("GROQ_API_KEY")
-    if api_key and api_key != "your_groq_key":
-        llm = ChatGroq(model="llama-3.3-70b-versatile")
-        prompt = f"""
+def _build_prompt(state):
+    return f"""
         You are a Metadata Router & Query Interpreter. 
         Your job is to identify the correct database tables and NORMALIZE the question even if it has typos or is incomplete.
         
@@ -42,26 +56,68 @@ def run(state):
         Output ONLY a JSON object:
         {{"corrected_question": "the fixed question", "tables": ["table1", "table2"]}}
         """
-        import json
+
+def _apply_routing(question, raw_response):
+    try:
+        raw_response = raw_response.strip()
+        # Handle potential markdown backticks
+        if "```" in raw_response:
+            raw_response = raw_response.split("```")[1].replace("json", "").strip()
+        
+        data = json.loads(raw_response)
+        return _routing_update(data.get("corrected_question", question), data.get("tables", ["sales"]))
+    except Exception as e:
+        print(f"Metadata Parse Error: {e}")
+        return _fallback_routing(question)
+
+def _routing_update(corrected_question, selected_tables):
+    # Router is a parallel branch: return only the keys it owns
+    return {
+        "corrected_question": corrected_question,
+        "metadata": {
+            "tables": selected_tables,
+            "columns": ["*"] # Let SQL Agent handle specific columns
+        },
+    }
+
+def _fallback_routing(question):
+    # Default tables when the router LLM is unavailable or unparseable; never
+    # memoized, so one failed call doesn't pin degraded routing
+    return skip_memo(_routing_update(question, ["sales"]))
+
+def run(state):
+    # Vault check only; on a miss the graph fans out to memory search, the
+    # table router and retrieval in parallel
+    _vault_shortcut(state)
+    return state
+
+def route(state):
+    # Dynamic Router LLM
+    llm = get_llm(timeout=remaining(state))
+    if llm:
         try:
-            raw_response = llm.invoke(prompt).content.strip()
-            # Handle potential markdown backticks
-            if "```" in raw_response:
-                raw_response = raw_response.split("```")[1].replace("json", "").strip()
-            
-            data = json.loads(raw_response)
-            state["corrected_question"] = data.get("corrected_question", state["question"])
-            selected_tables = data.get("tables", ["sales"])
+            with llm_call("metadata"):
+                response = llm.invoke(_build_prompt(state))
+            record_llm(response)
+            return _apply_routing(state["question"], response.content)
+        except DeadlineExceeded:
+            raise
         except Exception as e:
             print(f"Metadata Parse Error: {e}")
-            state["corrected_question"] = state["question"]
-            selected_tables = ["sales"]
-    else:
-        state["corrected_question"] = state["question"]
-        selected_tables = ["sales"] # Default fallback
+    return _fallback_routing(state["question"])
 
-    state["metadata"] = {
-        "tables": selected_tables,
-        "columns": ["*"] # Let SQL Agent handle specific columns
-    }
-    return state
+async def aroute(state):
+    # Async variant used by bi_graph.ainvoke - the event loop is released
+    # while Groq is doing network I/O
+    llm = get_llm()
+    if llm:
+        try:
+            with llm_call("metadata"):
+                response = await acall_llm(llm, _build_prompt(state), state, "metadata")
+            record_llm(response)
+            return _apply_routing(state["question"], response.content)
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            print(f"Metadata Parse Error: {e}")
+    return _fallback_routing(state["question"])
@@ -1 +1 @@
-def run(state): state['rag_context']=''; return state
+def run(state): return {'rag_context': ''}
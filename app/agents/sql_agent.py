@@ -1,33 +1,23 @@
-from langchain_groq import ChatGroq
-import os
-from dotenv import load_dotenv
+import re
+from app.agents.llm import get_llm
+from app.langgraph.deadline import check, remaining, acall_llm
+from app.observability.metrics import llm_call
+from app.observability.tracing import annotate, record_llm
+from app.agents.learned_vault import learned_vault
+from app.cache.node_memo import skip_memo
+from app.config import LEARNED_VAULT_ENABLED
 
-load_dotenv()
-
-def get_llm():
-    api_key = os.getenv("GROQ_API_KEY")
-    if not api_key or api_key == "your_groq_key":
-        return None
-    return ChatGroq(model="llama-3.3-70b-versatile")
-
-from app.agents.vault import get_vault_entry
-
-def run(state):
+def _vault_sql(state):
     # --- ENTERPRISE QUERY JOIN VAULT (Instant Fallback & Performance) ---
-    # Check if SQL was already set by metadata_agent vault check
+    # metadata_agent already did the vault lookup; vault hits are normally
+    # routed past this node, so only honour SQL that is already set
     if "sql" in state and state["sql"]:
         print(f"[VAULT] SQL already set for: {state['question']}")
-        return state
-
-    # Direct check just in case
-    entry = get_vault_entry(state["question"])
-    if entry:
-        state["sql"] = entry["sql"]
-        return state
+        return True
+    return False
 
-    llm = get_llm()
-    if llm:
-        prompt = f"""
+def _build_prompt(state):
+    return f"""
         You are an Enterprise BI Expert. Generate only the SQL query for the following question.
         
         # SCHEMA CONTEXT (15 Enterprise Tables):
@@ -61,22 +51,22 @@ def run(state):
         
         # PREVIOUS CONVERSATION CONTEXT
         History: {state.get('history', [])}
+        Relevant Memories: {state.get('memory_context', [])}
         Question: {state.get('corrected_question', state['question'])}
         SQL Query:"""
-        state["sql"] = llm.invoke(prompt).content.strip()
-    else:
-        # Fallback simple logic
-        q = state["question"].lower()
-        if "revenue" in q or "sales" in q:
-            state["sql"] = "SELECT * FROM sales"
-        else:
-            state["sql"] = "SELECT * FROM sales LIMIT 10"
-            
+
+def _fallback_sql(question):
+    # Fallback simple logic
+    q = question.lower()
+    if "revenue" in q or "sales" in q:
+        return "SELECT * FROM sales"
+    return "SELECT * FROM sales LIMIT 10"
+
+def _clean_sql(state):
     # Clean SQL - remove all markdown and noise
     sql = state["sql"]
     if "```" in sql:
         # Extract content between backticks
-        import re
         matches = re.findall(r"```(?:sql)?\s*(.*?)\s*```", sql, re.DOTALL)
         if matches:
             sql = matches[0]
@@ -85,3 +75,60 @@ def run(state):
     
     state["sql"] = sql.strip().rstrip(';')
     return state
+
+def run(state):
+    if _vault_sql(state):
+        return state
+
+    llm = get_llm(timeout=remaining(state))
+    if llm:
+        try:
+            with llm_call("sql"):
+                response = llm.invoke(_build_prompt(state))
+            record_llm(response)
+            state["sql"] = response.content.strip()
+            state["sql_source"] = "llm"
+        except Exception:
+            check(state, "sql")  # Report a budget-driven Groq timeout as such
+            raise
+    else:
+        state["sql"] = _fallback_sql(state["question"])
+        state["sql_source"] = "fallback"
+        skip_memo(state)  # Not the LLM's answer; don't keep it once a key is configured
+    return _clean_sql(state)
+
+async def arun(state):
+    # Async variant used by bi_graph.ainvoke - awaits the Groq round-trip
+    # instead of parking a worker thread on it.
+    if _vault_sql(state):
+        return state
+
+    llm = get_llm()
+    if llm:
+        with llm_call("sql"):
+            response = await acall_llm(llm, _build_prompt(state), state, "sql")
+        record_llm(response)
+        state["sql"] = response.content.strip()
+        state["sql_source"] = "llm"
+    else:
+        state["sql"] = _fallback_sql(state["question"])
+        state["sql_source"] = "fallback"
+        skip_memo(state)  # Not the LLM's answer; don't keep it once a key is configured
+    return _clean_sql(state)
+
+def learn(state, ok, schema):
+    # Called once the SQL has been executed: feeds the learned vault tier with
+    # LLM-generated SQL for standalone questions (follow-ups depend on the
+    # conversation, vault SQL is already known, warm-up runs replay the
+    # vault), and demotes learned SQL that failed.
+    if not LEARNED_VAULT_ENABLED:
+        return
+    if state.get("sql_source") == "learned":
+        if not ok:
+            learned_vault.demote(state["tenant_id"], state["question"], state["sql"])
+        return
+    if state.get("sql_source") != "llm" or state.get("history") or state.get("warmup"):
+        return
+    tables = state.get("metadata", {}).get("tables", [])
+    if learned_vault.record(state["tenant_id"], state["question"], state["sql"], tables, schema, ok):
+        annotate(learned_promoted=True)
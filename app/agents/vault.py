@@ -1,130 +1,363 @@
 # Enterprise Query Vault - Constant SQL for Predefined Questions
-# This ensures 100% reliability for the dashboard prompts.
-
-VAULT = {
-    # Finance & Strategy
-    "Compare allocated budget vs actual spend by department for all quarters of 2025.": {
-        "sql": "SELECT department, year, quarter, SUM(allocated_budget) as total_budget, SUM(actual_spend) as total_actual FROM operating_budget WHERE year = 2025 GROUP BY department, quarter",
-        "tables": ["operating_budget"]
-    },
-    "Which departments have the highest total expenses across 2024 and 2025?": {
-        "sql": "SELECT department_id, SUM(amount) as total_expenses FROM expenses WHERE date BETWEEN '2024-01-01' AND '2025-12-31' GROUP BY department_id ORDER BY total_expenses DESC",
-        "tables": ["expenses"]
-    },
-    "What is the total projected revenue for each month in 2026 based on current sales?": {
-        "sql": "SELECT strftime('%Y-%m', date) as month, SUM(revenue) * 1.15 as projected_revenue FROM sales WHERE date LIKE '2026%' GROUP BY month ORDER BY month",
-        "tables": ["sales"]
-    },
-    "Show me departments where actual spend exceeded the budget by more than 10%.": {
-        "sql": "SELECT department, year, quarter, allocated_budget, actual_spend, ((actual_spend - allocated_budget)/allocated_budget)*100 as variance_pct FROM operating_budget WHERE actual_spend > (allocated_budget * 1.10)",
-        "tables": ["operating_budget"]
-    },
-    "Break down total operating expenses by category for the last 12 months.": {
-        "sql": "SELECT category, SUM(amount) as total_amount FROM expenses WHERE date >= date('now', '-12 months') GROUP BY category ORDER BY total_amount DESC",
-        "tables": ["expenses"]
-    },
-    "Calculate regional ROI by comparing marketing spend vs sales revenue for each region.": {
-        "sql": "SELECT m.region, (SUM(s.revenue) / SUM(m.spend)) as regional_ROI, SUM(m.spend) as total_marketing_spend, SUM(s.revenue) as total_sales_revenue FROM marketing m JOIN sales s ON m.region = s.region WHERE m.date BETWEEN '2024-01-01' AND '2025-12-31' AND s.date BETWEEN '2024-01-01' AND '2025-12-31' GROUP BY m.region",
-        "tables": ["marketing", "sales"]
-    },
-
-    # CRM & Retention
-    "What are the top 3 reasons for customer churn in the last year?": {
-        "sql": "SELECT primary_reason, COUNT(*) as churn_count FROM churn_analysis WHERE churn_date >= date('now', '-1 year') GROUP BY primary_reason ORDER BY churn_count DESC LIMIT 3",
-        "tables": ["churn_analysis"]
-    },
-    "Show me the count of active vs canceled subscriptions across all plans.": {
-        "sql": "SELECT plan_name, status, COUNT(*) as count FROM subscriptions GROUP BY plan_name, status",
-        "tables": ["subscriptions"]
-    },
-    "Which loyalty tier (Gold/Silver/Bronze) has the highest total lifetime spend?": {
-        "sql": "SELECT loyalty_tier, SUM(total_spend) as lifetime_spend FROM customers GROUP BY loyalty_tier ORDER BY lifetime_spend DESC",
-        "tables": ["customers"]
-    },
-    "Show a monthly trend of new customer signups from 2023 to 2025.": {
-        "sql": "SELECT strftime('%Y-%m', signup_date) as month, COUNT(*) as signups FROM customers WHERE signup_date BETWEEN '2023-01-01' AND '2025-12-31' GROUP BY month ORDER BY month",
-        "tables": ["customers"]
-    },
-    "Compare the total spend of customers acquired through Google Ads vs Referrals.": {
-        "sql": "SELECT acquisition_channel, SUM(total_spend) as total_revenue FROM customers WHERE acquisition_channel IN ('GAds', 'Referral') GROUP BY acquisition_channel",
-        "tables": ["customers"]
-    },
-    "Show me the MRR (Monthly Recurring Revenue) share percentage of SaaS Pro vs Elite.": {
-        "sql": "SELECT plan_name, SUM(monthly_price) as MRR FROM subscriptions WHERE status = 'Active' AND plan_name IN ('SaaS Pro', 'SaaS Elite') GROUP BY plan_name",
-        "tables": ["subscriptions"]
-    },
-
-    # Growth & Marketing
-    "Show me the correlation between website sessions and marketing conversions for 2024.": {
-        "sql": "SELECT strftime('%Y-%m', date) as month, SUM(sessions) as sessions, SUM(conversions) as conversions FROM website_traffic WHERE date LIKE '2024%' GROUP BY month",
-        "tables": ["website_traffic"]
-    },
-    "Compare our SaaS Pro price against the average competitor market price.": {
-        "sql": "SELECT 'SaaS Pro' as product, 99.99 as our_price, AVG(market_price) as market_avg FROM competitor_metrics WHERE product_name = 'Standard Plan'",
-        "tables": ["competitor_metrics", "products"]
-    },
-    "Identify the marketing campaign with the single highest ROI ever recorded.": {
-        "sql": "SELECT name, roi, spend, conversions FROM marketing ORDER BY roi DESC",
-        "tables": ["marketing"]
-    },
-    "Compare the conversion rates of Mobile traffic vs Desktop traffic.": {
-        "sql": "SELECT device_type, AVG(conversion_rate) as avg_conv_rate FROM website_traffic GROUP BY device_type",
-        "tables": ["website_traffic"]
-    },
-    "Which marketing channel (FB, GAds, LI) has the lowest cost-per-conversion?": {
-        "sql": "SELECT channel, SUM(spend)/SUM(conversions) as cost_per_conv FROM marketing GROUP BY channel ORDER BY cost_per_conv ASC",
-        "tables": ["marketing"]
-    },
-    "Analyze the impact of product reviews on regional sales growth.": {
-        "sql": "SELECT s.region, AVG(pr.sentiment_score) as avg_sentiment, SUM(s.revenue) as revenue FROM product_reviews pr JOIN products p ON pr.product_id = p.product_id JOIN sales s ON p.name = s.product GROUP BY s.region",
-        "tables": ["product_reviews", "sales", "products"]
-    },
-
-    # Operations & Support
-    "Show me the average resolution time for High Priority tickets by support agent.": {
-        "sql": "SELECT agent_name, AVG(resolution_time_hrs) as avg_hours FROM support_tickets WHERE priority = 'High' GROUP BY agent_name",
-        "tables": ["support_tickets"]
-    },
-    "List all products where the current quantity on hand is below the reorder point.": {
-        "sql": "SELECT p.name, i.warehouse_location, i.quantity_on_hand, i.reorder_point FROM inventory i JOIN products p ON i.product_id = p.product_id WHERE i.quantity_on_hand < i.reorder_point",
-        "tables": ["inventory", "products"]
-    },
-    "Rank our top 5 Sales Reps by their Actual Sales vs Quota performance.": {
-        "sql": "SELECT name, actual_sales, quota, (actual_sales/quota)*100 as pct_attainment FROM employee_performance WHERE role = 'Sales Rep' ORDER BY pct_attainment DESC LIMIT 5",
-        "tables": ["employee_performance"]
-    },
-    "Identify all non-tax-deductible expenses greater than $5000 in the IT department.": {
-        "sql": "SELECT vendor_name, amount FROM expenses WHERE tax_deductible = 0 AND amount > 5000 AND department_id = 'IT' ORDER BY amount DESC",
-        "tables": ["expenses"]
-    },
-    "Show the distribution of inventory quantity across all warehouse locations.": {
-        "sql": "SELECT warehouse_location, SUM(quantity_on_hand) as total_inventory FROM inventory GROUP BY warehouse_location",
-        "tables": ["inventory"]
-    },
-    "Calculate the average customer satisfaction score for bug-related tickets.": {
-        "sql": "SELECT agent_name, AVG(customer_satisfaction) as avg_score FROM support_tickets WHERE issue_type = 'Bug' GROUP BY agent_name ORDER BY avg_score DESC",
-        "tables": ["support_tickets"]
-    }
-}
+# This ensures 100% reliability for the dashboard prompts. The certified
+# questions live in vault.json (VAULT_PATH) and are hot-reloaded: edit the
+# file (bumping "version") or POST /vault/reload - no redeploy needed.
 
+import asyncio
+import copy
 import difflib
+import hashlib
+import json
+import math
+import os
+import threading
+import time
+from collections import Counter, defaultdict
 
-def get_vault_entry(question):
-    q = question.strip().lower().rstrip('.')
-    
-    # 1. Exact/Normalized Match (Fast)
-    for k, v in VAULT.items():
-        if k.strip().lower().rstrip('.') == q:
-            return v
-            
-    # 2. Fuzzy Match (Resilience for Typos)
-    keys = list(VAULT.keys())
-    # Find the best match with at least 90% similarity
-    matches = difflib.get_close_matches(question, keys, n=1, cutoff=0.90)
-    
-    if matches:
-        matched_key = matches[0]
+from app.agents.vault_semantic import SemanticVaultIndex, load_embedder, question_numbers
+from app.agents.vault_templates import TemplateError, compile_template, extract_slots, bind
+from app.config import VAULT_SEMANTIC_ENABLED, VAULT_PATH, VAULT_WATCH_INTERVAL_SECONDS
+
+FUZZY_CUTOFF = 0.90
+FUZZY_PROBE_CANDIDATES = 500
+FUZZY_MAX_CANDIDATES = 25
+
+def normalize_question(question):
+    # Case/whitespace/trailing-period insensitive form used for matching and keys
+    return " ".join(question.split()).lower().rstrip('.')
+
+def _trigrams(text):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+class VaultIndex:
+    """
+    Lookup structure over the vault keys, built once per vault version:
+    - exact: normalized question -> entry (dict lookup instead of a scan)
+    - fuzzy: character-trigram inverted index. A question within the fuzzy
+      cutoff keeps most of its trigrams, so candidates are drawn only from
+      the postings of its rarest trigrams, filtered by trigram overlap and
+      length, and only the best few are scored with difflib. A fuzzy match
+      must mention the same numbers as the question, so "... of 2024"
+      never borrows the certified SQL for 2025.
+    """
+
+    def __init__(self, vault):
+        self.vault = vault
+        self.keys = list(vault.keys())
+        self.normalized = [normalize_question(k) for k in self.keys]
+        self.numbers = [question_numbers(norm) for norm in self.normalized]
+        self.exact = {}
+        self.postings = defaultdict(list)  # trigram -> key indexes
+        for idx, norm in enumerate(self.normalized):
+            self.exact.setdefault(norm, vault[self.keys[idx]])
+            for gram in _trigrams(norm):
+                self.postings[gram].append(idx)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def candidates(self, q):
+        # Key indexes worth scoring, most trigram overlap first. Needing a
+        # min_shared overlap means any qualifying key appears in the postings
+        # of the (len - min_shared + 1) rarest query trigrams; keys hit most
+        # often there are verified against the full trigram set.
+        grams = sorted(_trigrams(q), key=lambda g: len(self.postings.get(g, ())))
+        min_shared = max(1, math.ceil(len(grams) * 0.6))
+        hits = Counter()
+        for gram in grams[:len(grams) - min_shared + 1]:
+            hits.update(self.postings.get(gram, ()))
+        grams = set(grams)
+        shared = Counter()
+        for idx, _ in hits.most_common(FUZZY_PROBE_CANDIDATES):
+            norm = self.normalized[idx]
+            # SequenceMatcher ratio can't reach the cutoff with lengths this far apart
+            if 2 * min(len(norm), len(q)) / (len(norm) + len(q)) < FUZZY_CUTOFF:
+                continue
+            overlap = len(grams & _trigrams(norm))
+            if overlap >= min_shared:
+                shared[idx] = overlap
+        return [idx for idx, _ in shared.most_common(FUZZY_MAX_CANDIDATES)]
+
+    def match(self, question):
+        q = normalize_question(question)
+
+        # 1. Exact/Normalized Match (Fast)
+        entry = self.exact.get(q)
+        if entry is not None:
+            return entry, "hit", q
+
+        # 2. Fuzzy Match (Resilience for Typos) over the indexed candidates only
+        best_idx, best_ratio = None, FUZZY_CUTOFF
+        numbers = question_numbers(q)
+        matcher = difflib.SequenceMatcher()
+        matcher.set_seq2(q)
+        for idx in self.candidates(q):
+            if self.numbers[idx] != numbers:
+                continue
+            matcher.set_seq1(self.normalized[idx])
+            if matcher.real_quick_ratio() >= best_ratio and matcher.quick_ratio() >= best_ratio:
+                ratio = matcher.ratio()
+                if ratio >= best_ratio:
+                    best_idx, best_ratio = idx, ratio
+        if best_idx is not None:
+            return self.vault[self.keys[best_idx]], "fuzzy_hit", self.keys[best_idx]
+        return None, "miss", None
+
+class VaultError(Exception):
+    pass
+
+def parse_vault(raw):
+    # vault.json -> (version, {question: {"sql", "tables"}}, [template]);
+    # rejects the whole file on any malformed entry so a bad edit never
+    # half-applies
+    doc = json.loads(raw)
+    if not isinstance(doc, dict) or not isinstance(doc.get("entries"), list):
+        raise VaultError("expected an object with an 'entries' list")
+    vault = {}
+    for n, item in enumerate(doc["entries"]):
+        if not isinstance(item, dict) or not item.get("question") or not item.get("sql"):
+            raise VaultError(f"entry {n}: 'question' and 'sql' are required")
+        tables = item.get("tables", [])
+        if not isinstance(tables, list):
+            raise VaultError(f"entry {n}: 'tables' must be a list")
+        vault[item["question"]] = {"sql": item["sql"], "tables": tables}
+    templates = []
+    for item in doc.get("templates", []):
+        try:
+            templates.append(compile_template(item))
+        except (TemplateError, AttributeError) as e:
+            raise VaultError(str(e))
+    return doc.get("version", 0), vault, templates
+
+class VaultSnapshot:
+    """
+    One immutable vault version with its lookup indexes. Readers grab the
+    current snapshot once per lookup, so a reload swapping in a new one
+    never blocks them or mixes two versions within a lookup.
+    """
+
+    def __init__(self, version, checksum, vault, templates=()):
+        self.version = version
+        self.checksum = checksum
+        self.vault = vault
+        self.index = VaultIndex(vault)
+        # Templates are matched on their skeleton (slot values replaced by
+        # their type), with the same exact + fuzzy index as certified questions
+        self.templates = VaultIndex({t["skeleton"]: t for t in templates})
+        self.semantic = None
+        self.loaded_at = time.time()
+        self._semantic_built = False
+        self._semantic_lock = threading.Lock()
+
+    def semantic_index(self, embedder, wait=True):
+        # Embeds every vault question once; built by the startup warm-up, a
+        # reload, or a background thread started by the first lookup that
+        # needs it. Lookups pass wait=False: until the build finishes the
+        # semantic tier is a miss rather than a wait for the model. None
+        # when no embedder is available (the semantic tier is off).
+        if self._semantic_built:
+            return self.semantic
+        if not wait:
+            if not self._semantic_lock.locked():
+                threading.Thread(target=self._build_in_background, args=(embedder,), name="vault-semantic", daemon=True).start()
+            return None
+        with self._semantic_lock:
+            if not self._semantic_built:
+                model = embedder()
+                if model is not None:
+                    index = SemanticVaultIndex(self.index.normalized, model)
+                    print(f"[VAULT] Semantic index ready: {len(index.keys)} questions ({index.embedder.name}, threshold {index.threshold})")
+                    self.semantic = index
+                self._semantic_built = True
+        return self.semantic
+
+    def _build_in_background(self, embedder):
+        try:
+            self.semantic_index(embedder)
+        except Exception as e:
+            print(f"[VAULT] Semantic index build failed: {e}")
+
+    def info(self):
+        return {
+            "version": self.version,
+            "checksum": self.checksum,
+            "entries": len(self.vault),
+            "templates": len(self.templates),
+            "semantic_index": self.semantic is not None,
+            "loaded_at": self.loaded_at,
+        }
+
+class VaultStore:
+    """
+    Versioned vault file plus the snapshot built from it. reload() parses the
+    file and builds every index for the new version off the request path,
+    then publishes it with a single reference assignment. A watcher thread
+    polls the file's mtime (VAULT_WATCH_INTERVAL_SECONDS, 0 disables).
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.snapshot = None
+        self._model = None
+        self._model_loaded = False
+        self._model_lock = threading.Lock()
+        self._reload_lock = threading.Lock()
+        self._mtime = None
+        self._stop = threading.Event()
+        self._listeners = []
+        self._watcher = None
+        self.stats = {"reloads": 0, "failed_reloads": 0, "last_error": None}
+        self.reload()
+
+    def embedder(self):
+        # The model loads once (None: no embedder); fitted embedders (hashing)
+        # carry per-vault state, so every snapshot gets its own copy to fit
+        with self._model_lock:
+            if not self._model_loaded:
+                self._model = load_embedder()
+                self._model_loaded = True
+        return copy.copy(self._model) if hasattr(self._model, "fit") else self._model
+
+    def reload(self, force=False):
+        # Returns (changed, info). An unchanged file (same checksum) is a no-op
+        # unless forced; a broken file keeps the current snapshot serving.
+        with self._reload_lock:
+            mtime = None
+            try:
+                mtime = os.path.getmtime(self.path)
+                with open(self.path, "rb") as f:
+                    raw = f.read()
+                checksum = hashlib.sha256(raw).hexdigest()
+                old = self.snapshot
+                if old is not None and checksum == old.checksum and not force:
+                    # Same bytes as the live version (e.g. a broken edit reverted)
+                    self._mtime = mtime
+                    self.stats["last_error"] = None
+                    return False, old.info()
+                version, vault, templates = parse_vault(raw)
+                snapshot = VaultSnapshot(version, checksum, vault, templates)
+                # Rebuild the semantic index before the swap if one was in use
+                if VAULT_SEMANTIC_ENABLED and old is not None and old.semantic is not None:
+                    snapshot.semantic_index(self.embedder)
+            except (OSError, ValueError, VaultError) as e:
+                self._mtime = mtime  # The watcher retries only once the file changes again
+                self.stats["failed_reloads"] += 1
+                self.stats["last_error"] = f"{type(e).__name__}: {e}"
+                if self.snapshot is None:
+                    raise
+                print(f"[VAULT] Reload of {self.path} failed, keeping version {self.snapshot.version}: {e}")
+                return False, self.snapshot.info()
+
+            self.snapshot = snapshot
+            self._mtime = mtime
+            self.stats["reloads"] += 1
+            self.stats["last_error"] = None
+            if old is not None and version == old.version:
+                print(f"[VAULT] Warning: {self.path} changed without a version bump")
+            print(f"[VAULT] Loaded version {version}: {len(vault)} certified questions, {len(templates)} templates ({checksum[:12]})")
+        if old is not None:
+            for listener in self._listeners:
+                try:
+                    listener()
+                except Exception as e:
+                    print(f"[VAULT] Reload listener failed: {e}")
+        return True, snapshot.info()
+
+    def on_reload(self, listener):
+        # listener() runs after every swap to a new version (API or watcher)
+        self._listeners.append(listener)
+
+    def _watch(self):
+        while not self._stop.wait(VAULT_WATCH_INTERVAL_SECONDS):
+            try:
+                if os.path.getmtime(self.path) != self._mtime:
+                    self.reload()
+            except OSError as e:
+                print(f"[VAULT] Watch failed: {e}")
+
+    def start_watcher(self):
+        if VAULT_WATCH_INTERVAL_SECONDS <= 0 or (self._watcher and self._watcher.is_alive()):
+            return
+        self._stop.clear()
+        self._watcher = threading.Thread(target=self._watch, name="vault-watcher", daemon=True)
+        self._watcher.start()
+
+    def stop_watcher(self):
+        self._stop.set()
+        if self._watcher is not None:
+            self._watcher.join(timeout=5)
+            self._watcher = None
+
+    def info(self):
+        return {**self.snapshot.info(), "path": self.path, "watching": bool(self._watcher and self._watcher.is_alive()), **self.stats}
+
+vault_store = VaultStore(VAULT_PATH)
+
+def current_vault():
+    # {question: entry} of the live version; don't hold on to it across requests
+    return vault_store.snapshot.vault
+
+def vault_version():
+    return vault_store.snapshot.checksum[:16]
+
+def semantic_index():
+    if not VAULT_SEMANTIC_ENABLED:
+        return None
+    return vault_store.snapshot.semantic_index(vault_store.embedder)
+
+def match_template(snapshot, question):
+    # Fills a template's typed slots from the question; the entry carries
+    # the bound parameters next to the template SQL
+    skeleton, values = extract_slots(normalize_question(question))
+    if not values:
+        return None
+    template, _, _ = snapshot.templates.match(skeleton)
+    params = bind(template, values) if template else None
+    if params is None:
+        return None
+    return {"sql": template["sql"], "tables": template["tables"], "params": params, "template": template["id"]}
+
+def match_vault(question):
+    # Returns (entry, match_type) where match_type is "hit", "template_hit",
+    # "fuzzy_hit", "semantic_hit" or "miss". Template entries also carry
+    # "params" to bind into their SQL.
+    snapshot = vault_store.snapshot
+    entry, match_type, matched_key = snapshot.index.match(question)
+    if match_type == "fuzzy_hit":
         print(f"[VAULT] Fuzzy match found: '{question}' matches '{matched_key}'")
-        return VAULT[matched_key]
-        
-    return None
+    elif match_type == "miss" and len(snapshot.templates):
+        # 2b. Template Match - same question shape, different slot values
+        entry = match_template(snapshot, question)
+        if entry is not None:
+            print(f"[VAULT] Template match found: '{question}' -> {entry['template']} {entry['params']}")
+            return entry, "template_hit"
+    if match_type == "miss" and VAULT_SEMANTIC_ENABLED:
+        # 3. Semantic Match (paraphrases) - embedding cosine against every key
+        index = snapshot.semantic_index(vault_store.embedder, wait=False)
+        idx, score = index.match(normalize_question(question)) if index is not None else (None, 0.0)
+        if idx is not None:
+            matched_key = snapshot.index.keys[idx]
+            print(f"[VAULT] Semantic match found ({score:.2f}): '{question}' matches '{matched_key}'")
+            return snapshot.vault[matched_key], "semantic_hit"
+    return entry, match_type
+
+def get_vault_entry(question):
+    return match_vault(question)[0]
+
+def vault_match(state):
+    # (entry, match_type) for state["question"], matched once per request and
+    # carried in state: the cache key, the single-flight key and the metadata
+    # node all need it, and a template/semantic match is not free
+    match = state.get("vault_match")
+    if match is None:
+        entry, match_type = match_vault(state["question"])
+        match = state["vault_match"] = {"entry": entry, "type": match_type}
+    return match["entry"], match["type"]
+
+async def avault_match(state):
+    # Async endpoints match here first: a semantic lookup embeds the question,
+    # which must not run on the event loop
+    if state.get("vault_match") is None:
+        await asyncio.to_thread(vault_match, state)
+    return vault_match(state)
@@ -0,0 +1,206 @@
+import hashlib
+import re
+from collections import OrderedDict
+from importlib.util import find_spec
+
+from app.agents.vault_templates import REGIONS, PRODUCTS, CHANNELS
+from app.config import (
+    VAULT_EMBEDDER, VAULT_EMBEDDING_MODEL, VAULT_SEMANTIC_THRESHOLD, VAULT_HASHING_THRESHOLD, VAULT_HASHING_DIM,
+)
+
+# Optional dependency: sentence-transformers (installed with mem0's HuggingFace
+# embedder). Only probe here - loading torch waits for the index build.
+HAS_SENTENCE_TRANSFORMERS = find_spec("sentence_transformers") is not None
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+_NUMBER = re.compile(r"\d+")
+STOPWORDS = {
+    "a", "an", "the", "of", "for", "in", "on", "by", "to", "and", "or", "vs", "versus", "with", "all",
+    "what", "which", "show", "me", "is", "are", "was", "were", "how", "many", "much", "do", "does", "give", "list",
+}
+
+# Shorthand common in BI questions, expanded before hashing so "dept" lands
+# on the same features as "department"
+ABBREVIATIONS = {
+    "dept": "department", "depts": "departments", "qtr": "quarter", "qtrs": "quarters",
+    "rev": "revenue", "mktg": "marketing", "avg": "average", "cust": "customer", "custs": "customers",
+    "prod": "product", "prods": "products", "amt": "amount", "emp": "employee", "emps": "employees",
+    "mgr": "manager", "pct": "percentage", "conv": "conversion", "convs": "conversions",
+    "sub": "subscription", "subs": "subscriptions", "inv": "inventory", "tix": "tickets",
+}
+
+# Words that flip or narrow a question's meaning while barely moving its
+# embedding ("above" vs "below", "by region" vs "by department", "billing"
+# vs "bug" tickets). A semantic hit must agree with the question on them.
+DIRECTIONS = {
+    **dict.fromkeys(("above", "over", "exceed", "exceeds", "exceeded", "greater", "more", "higher"), "over"),
+    **dict.fromkeys(("below", "under", "less", "fewer", "lower"), "under"),
+    **dict.fromkeys(("highest", "top", "most", "best", "largest", "biggest", "max", "maximum"), "top"),
+    **dict.fromkeys(("lowest", "bottom", "least", "worst", "smallest", "fewest", "min", "minimum", "cheapest"), "bottom"),
+    **dict.fromkeys(("not", "non", "no", "without", "excluding", "except"), "not"),
+}
+DIMENSIONS = {
+    **{w: w.rstrip("s") for w in (
+        "region", "regions", "department", "departments", "product", "products", "channel", "channels",
+        "plan", "plans", "agent", "agents", "tier", "tiers", "device", "devices", "warehouse", "warehouses",
+        "campaign", "campaigns", "vendor", "vendors", "rep", "reps", "month", "months", "quarter", "quarters",
+    )},
+    "regional": "region", "category": "category", "categories": "category", "monthly": "month", "quarterly": "quarter",
+}
+# Filter values from the schema, on top of the template slot vocabularies
+FILTER_VALUES = {
+    **REGIONS, **PRODUCTS, **CHANNELS,
+    "bug": "Bug", "bugs": "Bug", "billing": "Billing", "login": "Login", "feature": "Feature",
+    "high priority": "High", "medium priority": "Medium", "low priority": "Low",
+    "mobile": "Mobile", "desktop": "Desktop", "gold": "Gold", "silver": "Silver", "bronze": "Bronze",
+    "active": "Active", "canceled": "Canceled", "cancelled": "Canceled",
+    "office supplies": "Office Supplies", "software": "Software", "travel": "Travel", "utilities": "Utilities",
+    "salaries": "Salaries", "hr": "HR", "finance": "Finance", "operations": "Operations", "r&d": "R&D",
+}
+_FILTER_VALUE = re.compile(
+    r"(?<![\w&])(?:" + "|".join(re.escape(v) for v in sorted(FILTER_VALUES, key=len, reverse=True)) + r")(?![\w&])"
+)
+
+def question_numbers(text):
+    # Years, top-N and similar literals; a semantic hit must agree on all of them
+    return frozenset(_NUMBER.findall(text))
+
+def contrast_terms(text):
+    # (directions, dimensions, filter values) mentioned by a question
+    words = [ABBREVIATIONS.get(w, w) for w in _TOKEN.findall(text.lower())]
+    return (
+        frozenset(DIRECTIONS[w] for w in words if w in DIRECTIONS),
+        frozenset(DIMENSIONS[w] for w in words if w in DIMENSIONS),
+        frozenset(FILTER_VALUES[v] for v in _FILTER_VALUE.findall(text.lower())),
+    )
+
+def compatible(question_terms, key_terms):
+    # Same directions and filter values; the question may group by fewer
+    # dimensions than the certified question, never by one it lacks
+    return (
+        question_terms[0] == key_terms[0]
+        and question_terms[2] == key_terms[2]
+        and question_terms[1] <= key_terms[1]
+    )
+
+class HashingEmbedder:
+    """
+    Model-free, opt-in (VAULT_EMBEDDER=hashing): signed feature hashing of content words plus their
+    4-character prefixes (so "departments" meets "department"), with common
+    abbreviations expanded first ("dept" -> "department"), IDF-weighted over
+    the vault questions (fit()) and L2-normalized.
+    """
+
+    name = "hashing"
+
+    def __init__(self, dim):
+        self.dim = dim
+        self.idf = {}
+        self.default_idf = 1.0
+
+    def _features(self, text):
+        words = [ABBREVIATIONS.get(w, w) for w in _TOKEN.findall(text.lower())]
+        words = [w for w in words if w not in STOPWORDS]
+        return set(words + [f"{w[:4]}~" for w in words if len(w) > 4])
+
+    def fit(self, texts):
+        import math
+        df = {}
+        for text in texts:
+            for feature in self._features(text):
+                df[feature] = df.get(feature, 0) + 1
+        n = len(texts)
+        self.idf = {f: math.log((1 + n) / (1 + c)) + 1 for f, c in df.items()}
+        self.default_idf = math.log(1 + n) + 1  # Unseen features weigh like the rarest
+        return self
+
+    def encode(self, texts):
+        import numpy as np
+        matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature in self._features(text):
+                digest = int.from_bytes(hashlib.blake2b(feature.encode(), digest_size=8).digest(), "big")
+                weight = self.idf.get(feature, self.default_idf)
+                matrix[row, digest % self.dim] += weight if digest >> 63 else -weight
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        return matrix / np.maximum(norms, 1e-12)
+
+class SentenceTransformerEmbedder:
+    name = "sentence-transformers"
+
+    def __init__(self, model_name):
+        from sentence_transformers import SentenceTransformer
+        self.model = SentenceTransformer(model_name, device="cpu")
+
+    def encode(self, texts):
+        import numpy as np
+        return self.model.encode(list(texts), normalize_embeddings=True, convert_to_numpy=True).astype(np.float32)
+
+def load_embedder():
+    # VAULT_EMBEDDER: "auto"/"sentence-transformers" (the model) or "hashing".
+    # The hashing vectorizer is too coarse to serve certified SQL unasked, so
+    # without the model the semantic tier is off (None) unless opted into.
+    if VAULT_EMBEDDER == "hashing":
+        return HashingEmbedder(VAULT_HASHING_DIM)
+    if not HAS_SENTENCE_TRANSFORMERS:
+        print("[VAULT] sentence-transformers not installed - semantic matching off (VAULT_EMBEDDER=hashing enables the hashing vectorizer)")
+        return None
+    try:
+        return SentenceTransformerEmbedder(VAULT_EMBEDDING_MODEL)
+    except Exception as e:
+        print(f"[VAULT] Embedding model unavailable ({e}) - semantic matching off")
+        return None
+
+class SemanticVaultIndex:
+    """
+    Embedding lookup over the vault questions: one L2-normalized row per key
+    in a NumPy matrix, so a lookup is a single matrix-vector product and a
+    top-k partition. A candidate is accepted at or above the threshold and
+    only if it mentions exactly the same numbers (years, top-N) as the
+    question, so "... 2024" never borrows the certified SQL for 2025, and
+    its contrast terms are compatible (see compatible()), so "above the
+    reorder point" never borrows the SQL for "below".
+    """
+
+    def __init__(self, keys, embedder, threshold=None, cache_size=4096):
+        self.keys = list(keys)
+        self.embedder = embedder
+        self.threshold = threshold if threshold is not None else (
+            VAULT_HASHING_THRESHOLD if embedder.name == "hashing" else VAULT_SEMANTIC_THRESHOLD
+        )
+        if hasattr(embedder, "fit"):
+            embedder.fit(self.keys)
+        self.matrix = embedder.encode(self.keys)
+        self.numbers = [question_numbers(k) for k in self.keys]
+        self.contrast = [contrast_terms(k) for k in self.keys]
+        self._cache = OrderedDict()  # question -> (key index or None, score)
+        self._cache_size = cache_size
+
+    def top_k(self, question, k=5):
+        import numpy as np
+        scores = self.matrix @ self.embedder.encode([question])[0]
+        k = min(k, len(scores))
+        if k == 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(int(i), float(scores[i])) for i in top]
+
+    def match(self, question):
+        # (key index, score) of the accepted match, or (None, best score)
+        if question in self._cache:
+            self._cache.move_to_end(question)
+            return self._cache[question]
+        numbers, terms = question_numbers(question), contrast_terms(question)
+        result, best = None, 0.0
+        for idx, score in self.top_k(question):
+            best = max(best, score)
+            if score < self.threshold:
+                break
+            if self.numbers[idx] == numbers and compatible(terms, self.contrast[idx]):
+                result = idx
+                break
+        self._cache[question] = (result, best)
+        if len(self._cache) > self._cache_size:
+            self._cache.popitem(last=False)
+        return result, best
@@ -0,0 +1,101 @@
+import re
+
+# Typed slots for parameterized vault templates. Each vocabulary maps the
+# phrasings users type (lower case) to the value stored in the database.
+REGIONS = {"north": "North", "south": "South", "east": "East", "west": "West"}
+PRODUCTS = {
+    "saas basic": "SaaS Basic", "saas plus": "SaaS Plus", "saas pro": "SaaS Pro",
+    "saas elite": "SaaS Elite", "enterprise plan": "Enterprise Plan",
+}
+CHANNELS = {
+    "fb": "FB", "facebook": "FB", "gads": "GAds", "google ads": "GAds",
+    "li": "LI", "linkedin": "LI", "organic": "Organic", "referral": "Referral", "referrals": "Referral",
+    "twitter": "Twitter", "email": "Email",
+}
+MONTHS = {
+    name: number
+    for number, names in enumerate([
+        ("january", "jan"), ("february", "feb"), ("march", "mar"), ("april", "apr"), ("may",),
+        ("june", "jun"), ("july", "jul"), ("august", "aug"), ("september", "sept", "sep"),
+        ("october", "oct"), ("november", "nov"), ("december", "dec"),
+    ], start=1)
+    for name in names
+}
+SLOT_TYPES = ("year", "month", "region", "product", "channel", "top_n")
+TOP_N_MAX = 100
+
+def _alternation(words):
+    # Longest first so "referrals" wins over "referral"
+    return "|".join(re.escape(w) for w in sorted(words, key=len, reverse=True))
+
+# One left-to-right pass over the normalized question. A month only counts
+# when a year follows it ("may 2025"), so the verb "may" is left alone.
+_SLOTS = re.compile(
+    r"\b(?P<year>(?:19|20)\d{2})\b"
+    rf"|\b(?P<month>{_alternation(MONTHS)})\b(?=,?\s+(?:19|20)\d{{2}}\b)"
+    r"|(?<=\btop )(?P<top_n>\d{1,3})\b"
+    rf"|\b(?P<region>{_alternation(REGIONS)})\b"
+    rf"|\b(?P<product>{_alternation(PRODUCTS)})\b"
+    rf"|\b(?P<channel>{_alternation(CHANNELS)})\b"
+)
+_PLACEHOLDER = re.compile(r"\{(\w+)\}")
+_BIND = re.compile(r"(?<!:):(\w+)\b")
+
+def _value(slot_type, text):
+    if slot_type in ("year", "top_n"):
+        value = int(text)
+        return value if slot_type == "year" or 1 <= value <= TOP_N_MAX else None
+    if slot_type == "month":
+        return MONTHS[text]
+    return {"region": REGIONS, "product": PRODUCTS, "channel": CHANNELS}[slot_type][text]
+
+def extract_slots(question):
+    # normalized question -> (skeleton, [(slot type, value), ...]). Every
+    # recognized value is replaced by its type placeholder, e.g.
+    # "top 5 reps for 2024" -> ("top {top_n} reps for {year}", [("top_n", 5), ("year", 2024)])
+    values = []
+
+    def replace(match):
+        slot_type = match.lastgroup
+        value = _value(slot_type, match.group(slot_type))
+        if value is None:
+            return match.group(0)
+        values.append((slot_type, value))
+        return "{" + slot_type + "}"
+
+    return _SLOTS.sub(replace, question), values
+
+class TemplateError(ValueError):
+    pass
+
+def compile_template(item):
+    # Validates one vault.json template and derives its skeleton (the
+    # question with each {slot} replaced by its type) and slot order
+    slots = item.get("slots") or {}
+    if not item.get("id") or not item.get("question") or not item.get("sql") or not slots:
+        raise TemplateError(f"template {item.get('id')!r}: 'id', 'question', 'sql' and 'slots' are required")
+    for name, spec in slots.items():
+        if spec.get("type") not in SLOT_TYPES:
+            raise TemplateError(f"template {item['id']!r}: slot {name!r} has unknown type {spec.get('type')!r}")
+    order = _PLACEHOLDER.findall(item["question"])
+    if sorted(order) != sorted(slots):
+        raise TemplateError(f"template {item['id']!r}: question placeholders {order} don't match slots {sorted(slots)}")
+    unbound = set(_BIND.findall(item["sql"])) - set(slots)
+    if unbound:
+        raise TemplateError(f"template {item['id']!r}: SQL binds undeclared slots {sorted(unbound)}")
+    skeleton = _PLACEHOLDER.sub(lambda m: "{" + slots[m.group(1)]["type"] + "}", item["question"])
+    return {
+        "id": item["id"],
+        "question": item["question"],
+        "sql": item["sql"],
+        "tables": item.get("tables", []),
+        "slots": [(name, slots[name]["type"]) for name in order],
+        "skeleton": skeleton,
+    }
+
+def bind(template, values):
+    # Slot values in question order -> bound parameters, or None when the
+    # types don't line up with the template's slots
+    if [t for _, t in template["slots"]] != [t for t, _ in values]:
+        return None
+    return {name: value for (name, _), (_, value) in zip(template["slots"], values)}
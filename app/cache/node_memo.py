@@ -0,0 +1,153 @@
+import asyncio
+import copy
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from app.observability.tracing import annotate
+from app.config import NODE_MEMO_ENABLED, NODE_MEMO_MAX_ENTRIES, NODE_MEMO_TTL_SECONDS, NODE_MEMO_DISK_PATH
+
+class NodeMemo:
+    """
+    Memoizes graph nodes that are pure functions of a few state keys (plus
+    the DB schema), such as the LLM table router and SQL generation. Each
+    node declares the keys it reads and the keys it writes; the cached value
+    is that state delta. In-process LRU + TTL, optionally write-through to a
+    local SQLite file so results survive restarts. Hit rates are per node.
+    """
+
+    def __init__(self, max_entries, ttl_seconds, disk_path=None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.disk_path = disk_path
+        self._entries = OrderedDict()  # key -> (expires_at, delta)
+        self._lock = threading.Lock()
+        self._disk = None
+        self.stats = {}  # node -> {"hits", "disk_hits", "misses"}
+
+    def _db(self):
+        # Opened on first use; check_same_thread=False because sync nodes run
+        # on executor threads (all access is under self._lock)
+        if self._disk is None:
+            self._disk = sqlite3.connect(self.disk_path, check_same_thread=False)
+            self._disk.execute("CREATE TABLE IF NOT EXISTS node_memo (key TEXT PRIMARY KEY, expires_at REAL, delta TEXT)")
+        return self._disk
+
+    def key(self, node, state, reads, version):
+        material = json.dumps([node, version] + [state.get(k) for k in reads], sort_keys=True, default=str)
+        return f"{node}:{hashlib.sha1(material.encode()).hexdigest()}"
+
+    def get(self, node, key):
+        now = time.time()
+        with self._lock:
+            stats = self.stats.setdefault(node, {"hits": 0, "disk_hits": 0, "misses": 0})
+            item = self._entries.get(key)
+            if item is not None and item[0] >= now:
+                self._entries.move_to_end(key)
+                stats["hits"] += 1
+                return copy.deepcopy(item[1])
+            if self.disk_path:
+                row = self._db().execute("SELECT expires_at, delta FROM node_memo WHERE key = ?", (key,)).fetchone()
+                if row is not None and row[0] >= now:
+                    delta = json.loads(row[1])
+                    self._remember(key, row[0], delta)
+                    stats["disk_hits"] += 1
+                    return copy.deepcopy(delta)
+            stats["misses"] += 1
+            return None
+
+    def put(self, key, delta):
+        expires_at = time.time() + self.ttl_seconds
+        with self._lock:
+            self._remember(key, expires_at, copy.deepcopy(delta))
+            if self.disk_path:
+                db = self._db()
+                db.execute("INSERT OR REPLACE INTO node_memo VALUES (?, ?, ?)", (key, expires_at, json.dumps(delta, default=str)))
+                db.commit()
+
+    def _remember(self, key, expires_at, delta):
+        self._entries[key] = (expires_at, delta)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+            if self.disk_path:
+                self._db().execute("DELETE FROM node_memo WHERE key = ?", (key,))
+                self._db().commit()
+
+    def clear(self):
+        # Drops every memoized delta (memory and disk); returns how many were in memory
+        with self._lock:
+            removed = len(self._entries)
+            self._entries.clear()
+            if self.disk_path:
+                self._db().execute("DELETE FROM node_memo")
+                self._db().commit()
+            return removed
+
+    def snapshot(self):
+        with self._lock:
+            nodes = {}
+            for node, s in self.stats.items():
+                lookups = s["hits"] + s["disk_hits"] + s["misses"]
+                nodes[node] = {**s, "hit_rate": round((s["hits"] + s["disk_hits"]) / lookups, 4) if lookups else 0.0}
+            return {"entries": len(self._entries), "disk": bool(self.disk_path), "nodes": nodes}
+
+node_memo = NodeMemo(NODE_MEMO_MAX_ENTRIES, NODE_MEMO_TTL_SECONDS, NODE_MEMO_DISK_PATH or None)
+
+# Set on a node's update by a degraded path (e.g. an LLM call that failed and
+# fell back to a default): memoize() passes the update on but never stores it
+SKIP_MEMO = "_skip_memo"
+
+def skip_memo(update):
+    update[SKIP_MEMO] = True
+    return update
+
+def memoize(node, reads, writes, version=lambda: ""):
+    # Decorator for a node's run/arun: on a hit the node body (and its LLM
+    # call) is skipped and only the cached delta of `writes` is returned.
+    # version() adds an external input to the key, e.g. the schema version.
+    # decorate.forget(state) drops the entry a state would hit, e.g. once its
+    # output turned out to be bad.
+    def decorate(fn):
+        if not NODE_MEMO_ENABLED:
+            return fn
+
+        def lookup(state):
+            key = node_memo.key(node, state, reads, version())
+            delta = node_memo.get(node, key)
+            annotate(memo_hit=delta is not None)
+            return key, delta
+
+        def store(key, update):
+            if not update.pop(SKIP_MEMO, False):
+                node_memo.put(key, {k: update[k] for k in writes if k in update})
+            return update
+
+        if asyncio.iscoroutinefunction(fn):
+            async def arun(state):
+                key, delta = lookup(state)
+                if delta is not None:
+                    return delta
+                return store(key, await fn(state))
+            return arun
+
+        def run(state):
+            key, delta = lookup(state)
+            if delta is not None:
+                return delta
+            return store(key, fn(state))
+        return run
+
+    def forget(state):
+        if NODE_MEMO_ENABLED:
+            node_memo.delete(node_memo.key(node, state, reads, version()))
+
+    decorate.forget = forget
+    return decorate
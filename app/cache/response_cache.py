@@ -0,0 +1,90 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+
+from app.config import RESPONSE_CACHE_MAX_ENTRIES, RESPONSE_CACHE_TTL_SECONDS, RESPONSE_CACHE_MAX_BYTES
+
+def history_fingerprint(history):
+    # Short stable hash of the conversation context sent with a question
+    if not history:
+        return ""
+    return hashlib.sha1(json.dumps(history, sort_keys=True, default=str).encode()).hexdigest()[:16]
+
+class ResponseCache:
+    """
+    LRU + TTL cache for final /ask responses.
+    Keys are built by the caller (tenant, normalized question, ..., data version);
+    each entry remembers the tables it read so writes can invalidate precisely.
+    """
+
+    def __init__(self, max_entries, ttl_seconds, max_bytes):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> (expires_at, size, tables, response)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0, "invalidations": 0}
+
+    def get(self, key):
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                self.stats["misses"] += 1
+                return None
+            if item[0] < time.monotonic():
+                self._drop(key)
+                self.stats["expirations"] += 1
+                self.stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return item[3]
+
+    def put(self, key, response, tables=()):
+        size = len(json.dumps(response, default=str))
+        if size > self.max_bytes:
+            return  # Never let one huge result flush the whole cache
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, size, frozenset(tables), response)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+                self.stats["evictions"] += 1
+
+    def invalidate(self, tenant_id=None, tables=None):
+        # Drop entries for a tenant and/or that read any of the given tables.
+        # Keys are tuples whose first element is the tenant id.
+        tables = set(tables or [])
+        with self._lock:
+            doomed = [
+                k for k, item in self._entries.items()
+                if (tenant_id is None or k[0] == tenant_id) and (not tables or item[2] & tables)
+            ]
+            for k in doomed:
+                self._drop(k)
+            self.stats["invalidations"] += len(doomed)
+        return len(doomed)
+
+    def snapshot(self):
+        with self._lock:
+            lookups = self.stats["hits"] + self.stats["misses"]
+            return {
+                **self.stats,
+                "hit_rate": round(self.stats["hits"] / lookups, 4) if lookups else 0.0,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl_seconds,
+            }
+
+    def _drop(self, key):
+        item = self._entries.pop(key)
+        self._bytes -= item[1]
+
+response_cache = ResponseCache(RESPONSE_CACHE_MAX_ENTRIES, RESPONSE_CACHE_TTL_SECONDS, RESPONSE_CACHE_MAX_BYTES)
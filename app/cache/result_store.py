@@ -0,0 +1,132 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from app.config import RESULT_STORE_TTL_SECONDS, RESULT_STORE_MAX_ROWS, RESULT_STORE_PIN_SECONDS
+
+class ColumnarResult:
+    """
+    A query result held column by column: the names once plus one value list
+    per column. Graph state only carries a handle to it (see handle()); rows
+    are materialized as dicts only for the slice that is actually serialized.
+    """
+
+    __slots__ = ("columns", "data", "num_rows")
+
+    def __init__(self, columns, data, num_rows):
+        self.columns = list(columns)
+        self.data = data  # one list per column, aligned with self.columns
+        self.num_rows = num_rows
+
+    @classmethod
+    def from_rows(cls, rows):
+        columns = list(rows[0].keys()) if rows else []
+        return cls(columns, [[row[c] for row in rows] for c in columns], len(rows))
+
+    def __len__(self):
+        return self.num_rows
+
+    def column(self, name):
+        return self.data[self.columns.index(name)]
+
+    def rows(self, start=0, end=None):
+        # Row dicts for [start, end) - the only place rows are built
+        end = self.num_rows if end is None else min(end, self.num_rows)
+        sliced = [values[start:end] for values in self.data]
+        return [dict(zip(self.columns, row)) for row in zip(*sliced)]
+
+class ResultStore:
+    """
+    Server-side holder for query results. execute_agent puts every result here
+    (columnar) and graph state carries only a handle; /ask ships the first
+    page and further pages are served by cursor from /results/{cursor}.
+    Results expire after a TTL, and the store as a whole is capped by total
+    row count (oldest results are evicted first). A result put with
+    pinned=True is still in flight (between execute and bi) and is not
+    evicted for space until unpin() or until its pin lease runs out, so a
+    run that fails or is abandoned after execute can't keep rows past the
+    cap for the whole TTL.
+    """
+
+    def __init__(self, ttl_seconds, max_rows, pin_seconds):
+        self.ttl_seconds = ttl_seconds
+        self.max_rows = max_rows
+        self.pin_seconds = pin_seconds
+        self._results = OrderedDict()  # result_id -> (expires_at, tenant_id, ColumnarResult)
+        self._rows = 0
+        self._pinned = {}  # result_id -> pin lease expiry
+        self._lock = threading.Lock()
+
+    def put(self, tenant_id, result, pinned=False):
+        result_id = uuid.uuid4().hex
+        with self._lock:
+            self._purge_expired()
+            self._results[result_id] = (time.monotonic() + self.ttl_seconds, tenant_id, result)
+            self._rows += len(result)
+            if pinned:
+                self._pinned[result_id] = time.monotonic() + self.pin_seconds
+            self._shrink(keep=result_id)
+        return result_id
+
+    def unpin(self, result_id):
+        with self._lock:
+            self._pinned.pop(result_id, None)
+            self._shrink(keep=result_id)
+
+    def _shrink(self, keep):
+        # Evict oldest first down to the row cap, skipping in-flight results
+        # and the newest one; pinned results may overshoot the cap briefly
+        now = time.monotonic()
+        for result_id in list(self._results):
+            if self._rows <= self.max_rows:
+                break
+            if result_id != keep and self._pinned.get(result_id, 0) < now:
+                self._drop(result_id)
+
+    def get(self, result_id, tenant_id):
+        # Returns the stored result, or None when unknown / expired / wrong tenant
+        with self._lock:
+            item = self._results.get(result_id)
+            if item is None or item[1] != tenant_id:
+                return None
+            if item[0] < time.monotonic():
+                self._drop(result_id)
+                return None
+            return item[2]
+
+    def _purge_expired(self):
+        now = time.monotonic()
+        for result_id in [k for k, item in self._results.items() if item[0] < now]:
+            self._drop(result_id)
+
+    def _drop(self, result_id):
+        item = self._results.pop(result_id)
+        self._rows -= len(item[2])
+        self._pinned.pop(result_id, None)
+
+def make_cursor(result_id, offset):
+    return f"{result_id}.{offset}"
+
+def parse_cursor(cursor):
+    # Returns (result_id, offset) or None for malformed cursors
+    result_id, _, offset = cursor.partition(".")
+    if not result_id or not offset.isdigit():
+        return None
+    return result_id, int(offset)
+
+def handle(result_id, result):
+    # What graph state carries instead of the rows themselves
+    return {"result_id": result_id, "columns": result.columns, "row_count": len(result)}
+
+def paginate(result, result_id, offset, page_size):
+    # One page of rows plus the cursor for the next one (None on the last page)
+    end = offset + page_size
+    return {
+        "data": result.rows(offset, end),
+        "offset": offset,
+        "total_rows": len(result),
+        "next_cursor": make_cursor(result_id, end) if end < len(result) else None,
+    }
+
+result_store = ResultStore(RESULT_STORE_TTL_SECONDS, RESULT_STORE_MAX_ROWS, RESULT_STORE_PIN_SECONDS)
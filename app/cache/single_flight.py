@@ -0,0 +1,35 @@
+import asyncio
+
+class SingleFlight:
+    """
+    Request coalescing: concurrent callers with the same key share one
+    in-flight execution instead of each running the full graph.
+    The work runs as its own task, so a leader whose client disconnects does
+    not cancel the execution the followers are waiting on.
+    """
+
+    def __init__(self):
+        self._in_flight = {}  # key -> asyncio.Task
+        self.stats = {"executions": 0, "coalesced": 0}
+
+    async def do(self, key, work):
+        task = self._in_flight.get(key)
+        if task is not None:
+            self.stats["coalesced"] += 1
+            return await asyncio.shield(task)
+
+        task = asyncio.ensure_future(work())
+        self._in_flight[key] = task
+        self.stats["executions"] += 1
+        task.add_done_callback(lambda _t: self._in_flight.pop(key, None))
+        return await asyncio.shield(task)
+
+    def snapshot(self):
+        total = self.stats["executions"] + self.stats["coalesced"]
+        return {
+            **self.stats,
+            "in_flight": len(self._in_flight),
+            "coalesced_ratio": round(self.stats["coalesced"] / total, 4) if total else 0.0,
+        }
+
+single_flight = SingleFlight()
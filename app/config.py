@@ -1 +1,99 @@
 import os
+
+# --- Streaming (/ask/stream) ---
+STREAM_CHUNK_ROWS = int(os.getenv("STREAM_CHUNK_ROWS", "500"))
+
+# --- Batch (/ask/batch) ---
+BATCH_MAX_WORKERS = int(os.getenv("BATCH_MAX_WORKERS", "8"))
+BATCH_MAX_QUESTIONS = int(os.getenv("BATCH_MAX_QUESTIONS", "100"))
+
+# --- Response cache (/ask) ---
+RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "true").lower() == "true"
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "512"))
+RESPONSE_CACHE_TTL_SECONDS = float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "300"))
+RESPONSE_CACHE_MAX_BYTES = int(os.getenv("RESPONSE_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+# --- Result pagination (/results/{cursor}) ---
+RESULT_PAGE_SIZE = int(os.getenv("RESULT_PAGE_SIZE", "500"))
+RESULT_STORE_TTL_SECONDS = float(os.getenv("RESULT_STORE_TTL_SECONDS", "900"))
+RESULT_STORE_MAX_ROWS = int(os.getenv("RESULT_STORE_MAX_ROWS", "1000000"))
+RESULT_STORE_PIN_SECONDS = float(os.getenv("RESULT_STORE_PIN_SECONDS", "60"))  # Max time an in-flight result is exempt from the row cap
+EXECUTE_MAX_ROWS = int(os.getenv("EXECUTE_MAX_ROWS", "100000"))
+
+# --- Admission control (per tenant) ---
+ADMISSION_MAX_CONCURRENCY = int(os.getenv("ADMISSION_MAX_CONCURRENCY", "4"))
+ADMISSION_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", "32"))
+ADMISSION_MAX_WAIT_SECONDS = float(os.getenv("ADMISSION_MAX_WAIT_SECONDS", "30"))
+
+# --- Request deadlines ---
+REQUEST_TIMEOUT_SECONDS = float(os.getenv("REQUEST_TIMEOUT_SECONDS", "10"))
+REQUEST_TIMEOUT_MAX_SECONDS = float(os.getenv("REQUEST_TIMEOUT_MAX_SECONDS", "120"))
+SQLITE_PROGRESS_OPCODES = int(os.getenv("SQLITE_PROGRESS_OPCODES", "10000"))
+
+# --- Startup ---
+# "lazy": mem0 + embedder load on the first query; "background": load in a
+# warm-up thread as soon as the API starts
+MEMORY_WARMUP = os.getenv("MEMORY_WARMUP", "lazy")
+
+# --- Readiness warm-up (/ready) ---
+WARMUP_ON_STARTUP = os.getenv("WARMUP_ON_STARTUP", "true").lower() == "true"
+WARMUP_VAULT = os.getenv("WARMUP_VAULT", "true").lower() == "true"
+WARMUP_TENANTS = [t.strip() for t in os.getenv("WARMUP_TENANTS", "t1").split(",") if t.strip()]
+WARMUP_DB_CONNECTIONS = int(os.getenv("WARMUP_DB_CONNECTIONS", "5"))
+WARMUP_MAX_ATTEMPTS = int(os.getenv("WARMUP_MAX_ATTEMPTS", "0"))  # Per step; 0 retries until it succeeds
+WARMUP_RETRY_BASE_SECONDS = float(os.getenv("WARMUP_RETRY_BASE_SECONDS", "1"))
+WARMUP_RETRY_MAX_SECONDS = float(os.getenv("WARMUP_RETRY_MAX_SECONDS", "60"))
+
+# --- Background jobs (/jobs) ---
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+JOB_MAX_QUEUED = int(os.getenv("JOB_MAX_QUEUED", "100"))
+JOB_TIMEOUT_SECONDS = float(os.getenv("JOB_TIMEOUT_SECONDS", "600"))
+JOB_RETENTION_SECONDS = float(os.getenv("JOB_RETENTION_SECONDS", "3600"))
+# Running jobs per tenant; kept below ADMISSION_MAX_CONCURRENCY so jobs never hold every slot /ask needs
+JOB_MAX_PER_TENANT = min(
+    int(os.getenv("JOB_MAX_PER_TENANT", str(max(1, ADMISSION_MAX_CONCURRENCY // 2)))),
+    max(1, ADMISSION_MAX_CONCURRENCY - 1),
+)
+
+# --- Conversation sessions ---
+SESSION_TTL_SECONDS = float(os.getenv("SESSION_TTL_SECONDS", "3600"))
+SESSION_MAX_SESSIONS = int(os.getenv("SESSION_MAX_SESSIONS", "10000"))
+SESSION_MAX_TURNS = int(os.getenv("SESSION_MAX_TURNS", "5"))
+SESSION_TURN_MAX_CHARS = int(os.getenv("SESSION_TURN_MAX_CHARS", "300"))
+
+# --- Tracing ---
+TRACE_ENABLED = os.getenv("TRACE_ENABLED", "true").lower() == "true"
+TRACE_STORE_PATH = os.getenv("TRACE_STORE_PATH", "traces/traces.jsonl")
+TRACE_STORE_MAX_BYTES = int(os.getenv("TRACE_STORE_MAX_BYTES", str(10 * 1024 * 1024)))
+TRACE_STORE_BACKUPS = int(os.getenv("TRACE_STORE_BACKUPS", "5"))
+
+# --- Graph checkpoints (resume retries by request_id) ---
+CHECKPOINT_ENABLED = os.getenv("CHECKPOINT_ENABLED", "true").lower() == "true"
+CHECKPOINT_DB_PATH = os.getenv("CHECKPOINT_DB_PATH", "checkpoints/graph_checkpoints.sqlite")
+CHECKPOINT_TTL_SECONDS = float(os.getenv("CHECKPOINT_TTL_SECONDS", "3600"))  # Failed/abandoned runs stay resumable this long
+CHECKPOINT_PURGE_INTERVAL_SECONDS = float(os.getenv("CHECKPOINT_PURGE_INTERVAL_SECONDS", "300"))
+
+# --- Node memoization (router / SQL generation) ---
+NODE_MEMO_ENABLED = os.getenv("NODE_MEMO_ENABLED", "true").lower() == "true"
+NODE_MEMO_MAX_ENTRIES = int(os.getenv("NODE_MEMO_MAX_ENTRIES", "2048"))
+NODE_MEMO_TTL_SECONDS = float(os.getenv("NODE_MEMO_TTL_SECONDS", "3600"))
+NODE_MEMO_DISK_PATH = os.getenv("NODE_MEMO_DISK_PATH", "")  # e.g. checkpoints/node_memo.sqlite
+
+# --- Vault store (hot-reloaded certified questions) ---
+VAULT_PATH = os.getenv("VAULT_PATH", os.path.join(os.path.dirname(__file__), "agents", "vault.json"))
+VAULT_WATCH_INTERVAL_SECONDS = float(os.getenv("VAULT_WATCH_INTERVAL_SECONDS", "5"))  # 0 disables the file watch
+
+# --- Semantic vault matching ---
+VAULT_SEMANTIC_ENABLED = os.getenv("VAULT_SEMANTIC_ENABLED", "true").lower() == "true"
+VAULT_EMBEDDER = os.getenv("VAULT_EMBEDDER", "auto")  # auto | sentence-transformers (off if not installed) | hashing (opt-in)
+VAULT_EMBEDDING_MODEL = os.getenv("VAULT_EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+VAULT_SEMANTIC_THRESHOLD = float(os.getenv("VAULT_SEMANTIC_THRESHOLD", "0.80"))
+VAULT_HASHING_THRESHOLD = float(os.getenv("VAULT_HASHING_THRESHOLD", "0.65"))
+VAULT_HASHING_DIM = int(os.getenv("VAULT_HASHING_DIM", "4096"))
+
+# --- Learned vault (promoted LLM-generated SQL) ---
+LEARNED_VAULT_ENABLED = os.getenv("LEARNED_VAULT_ENABLED", "true").lower() == "true"
+LEARNED_VAULT_PROMOTE_AFTER = int(os.getenv("LEARNED_VAULT_PROMOTE_AFTER", "3"))  # Successful runs of the same SQL
+LEARNED_VAULT_MAX_ENTRIES = int(os.getenv("LEARNED_VAULT_MAX_ENTRIES", "1000"))
+LEARNED_VAULT_MAX_CANDIDATES = int(os.getenv("LEARNED_VAULT_MAX_CANDIDATES", "10000"))
+LEARNED_VAULT_DB_PATH = os.getenv("LEARNED_VAULT_DB_PATH", "checkpoints/learned_vault.sqlite")  # "" keeps it in memory only
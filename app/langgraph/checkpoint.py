@@ -0,0 +1,130 @@
+import asyncio
+import hashlib
+import json
+import os
+import time
+from importlib.util import find_spec
+
+from app.langgraph.graph import graph
+from app.cache.result_store import result_store
+from app.config import CHECKPOINT_ENABLED, CHECKPOINT_DB_PATH, CHECKPOINT_TTL_SECONDS, CHECKPOINT_PURGE_INTERVAL_SECONDS
+
+# Optional dependency: langgraph-checkpoint-sqlite (+ aiosqlite)
+HAS_SQLITE_CHECKPOINTER = find_spec("langgraph.checkpoint.sqlite") is not None
+
+class Checkpoints:
+    """
+    Resumable runs for requests that carry a request_id. The graph is compiled
+    a second time with a local SQLite checkpointer (one thread per tenant +
+    request id + question/history fingerprint, so reusing a request_id for a
+    different question starts a fresh run), so a retry after a failure - e.g. a locked database after a
+    costly Groq SQL generation - continues from the last successful node
+    instead of starting over. Requests without a request_id use the plain
+    bi_graph and never touch the checkpoint DB.
+
+    Successful runs delete their thread right away. Threads of failed or
+    abandoned runs are tracked with their start time in checkpoint_threads
+    and purged by a background task once older than the TTL.
+    """
+
+    def __init__(self, path, ttl_seconds):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.graph = None  # Checkpointed compile of the BI graph once open()
+        self._saver = None
+        self._conn = None
+        self._purger = None
+
+    async def open(self):
+        if not CHECKPOINT_ENABLED:
+            return
+        if not HAS_SQLITE_CHECKPOINTER:
+            print("[CHECKPOINT] langgraph-checkpoint-sqlite not installed - retries recompute every node")
+            return
+        import aiosqlite
+        from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._conn = await aiosqlite.connect(self.path)
+        self._saver = AsyncSqliteSaver(self._conn)
+        await self._saver.setup()
+        async with self._saver.lock:
+            await self._conn.execute("CREATE TABLE IF NOT EXISTS checkpoint_threads (thread_id TEXT PRIMARY KEY, created_at REAL)")
+            # Threads left by older versions get a TTL starting now
+            await self._conn.execute(
+                "INSERT OR IGNORE INTO checkpoint_threads SELECT DISTINCT thread_id, ? FROM checkpoints", (time.time(),)
+            )
+            await self._conn.commit()
+        self.graph = graph.compile(checkpointer=self._saver)
+        self._purger = asyncio.create_task(self._purge_loop())
+        print(f"[CHECKPOINT] Resumable runs enabled ({self.path}, ttl {self.ttl_seconds:.0f}s)")
+
+    async def close(self):
+        if self._purger is not None:
+            self._purger.cancel()
+        if self._conn is not None:
+            await self._conn.close()
+        self.graph = self._saver = self._conn = self._purger = None
+
+    async def purge_expired(self):
+        # Deletes threads older than the TTL; returns how many went
+        cutoff = time.time() - self.ttl_seconds
+        async with self._saver.lock:
+            async with self._conn.execute("SELECT thread_id FROM checkpoint_threads WHERE created_at < ?", (cutoff,)) as cur:
+                expired = [row[0] for row in await cur.fetchall()]
+        for thread_id in expired:
+            await self._forget(thread_id)
+        if expired:
+            print(f"[CHECKPOINT] Purged {len(expired)} expired runs")
+        return len(expired)
+
+    async def _purge_loop(self):
+        while True:
+            await asyncio.sleep(CHECKPOINT_PURGE_INTERVAL_SECONDS)
+            try:
+                await self.purge_expired()
+            except Exception as e:
+                print(f"[CHECKPOINT] Purge failed: {e}")
+
+    async def _forget(self, thread_id):
+        await self._saver.adelete_thread(thread_id)
+        async with self._saver.lock:
+            await self._conn.execute("DELETE FROM checkpoint_threads WHERE thread_id = ?", (thread_id,))
+            await self._conn.commit()
+
+    @staticmethod
+    def config(graph_input, request_id):
+        material = json.dumps([graph_input["question"], graph_input.get("history") or []], sort_keys=True, default=str)
+        fingerprint = hashlib.sha1(material.encode()).hexdigest()[:16]
+        return {"configurable": {"thread_id": f"{graph_input['tenant_id']}:{request_id}:{fingerprint}"}}
+
+    async def plan(self, graph_input, request_id):
+        # (input, config) for this attempt. If an earlier attempt left a
+        # checkpoint, resume it - with the new attempt's deadline, since the
+        # stored one has usually passed by the time the client retries.
+        # A finished run returns its stored state without re-running anything.
+        from langgraph.types import Command
+        config = self.config(graph_input, request_id)
+        snapshot = await self.graph.aget_state(config)
+        if snapshot.values:
+            handle = snapshot.values.get("result")
+            if "bi" in snapshot.next and handle and result_store.get(handle["result_id"], graph_input["tenant_id"]) is None:
+                # The rows outlived their result-store TTL: run execute again
+                # (as if impact had just finished) instead of failing at bi
+                await self.graph.aupdate_state(config, None, as_node="impact")
+                snapshot = await self.graph.aget_state(config)
+            print(f"[CHECKPOINT] Resuming {request_id} at {list(snapshot.next) or 'end'}")
+            return Command(update={"deadline": graph_input.get("deadline")}), config
+        async with self._saver.lock:
+            await self._conn.execute(
+                "INSERT OR IGNORE INTO checkpoint_threads VALUES (?, ?)", (config["configurable"]["thread_id"], time.time())
+            )
+            await self._conn.commit()
+        return graph_input, config
+
+    async def release(self, config):
+        # A completed run's checkpoints are no longer needed; answers to
+        # repeated questions come from the response cache
+        if config is not None and self._saver is not None:
+            await self._forget(config["configurable"]["thread_id"])
+
+checkpoints = Checkpoints(CHECKPOINT_DB_PATH, CHECKPOINT_TTL_SECONDS)
@@ -0,0 +1,48 @@
+import asyncio
+import time
+
+class DeadlineExceeded(Exception):
+    """Raised when a request's time budget (state["deadline"]) runs out."""
+    def __init__(self, stage, deadline=None):
+        super().__init__(f"Request deadline exceeded during '{stage}' stage")
+        self.stage = stage
+        self.deadline = deadline
+
+def remaining(state):
+    # Seconds left in the request budget, or None when no deadline is set
+    deadline = state.get("deadline")
+    if not deadline:
+        return None
+    return deadline - time.time()
+
+def check(state, stage):
+    left = remaining(state)
+    if left is not None and left <= 0:
+        raise DeadlineExceeded(stage, state.get("deadline"))
+
+async def acall_llm(llm, prompt, state, stage):
+    # Cancels the in-flight Groq request when the budget runs out
+    check(state, stage)
+    try:
+        return await asyncio.wait_for(llm.ainvoke(prompt), timeout=remaining(state))
+    except asyncio.TimeoutError:
+        raise DeadlineExceeded(stage, state.get("deadline"))
+
+def guard(stage, fn):
+    # Wraps a graph node: refuse to start, and refuse to hand over a result,
+    # once the request deadline has passed. Parallel-branch nodes return only
+    # their own keys, so the post-check reads the deadline from the input.
+    def run(state):
+        check(state, stage)
+        update = fn(state)
+        check(state, stage)
+        return update
+    return run
+
+def aguard(stage, fn):
+    async def arun(state):
+        check(state, stage)
+        update = await fn(state)
+        check(state, stage)
+        return update
+    return arun
@@ -1,20 +1,93 @@
-from langgraph.graph import StateGraph
+from langchain_core.runnables import RunnableLambda
+from langgraph.graph import StateGraph, END
 from app.langgraph.state import BIState
-from app.agents import metadata_agent, rag_agent, sql_agent, impact_agent, execute_agent, bi_agent
+from app.langgraph.deadline import DeadlineExceeded, guard, aguard
+from app.observability.metrics import timed, atimed
+from app.observability.tracing import traced, atraced
+from app.cache.node_memo import memoize
+from app.agents import cache_agent, metadata_agent, memory_agent, rag_agent, sql_agent, impact_agent, execute_agent, bi_agent
+
+def _node(stage, run, arun=None):
+    # Every node is deadline-guarded, timed (see /metrics) and traced (a span
+    # per node in state["trace"]). Nodes with I/O carry both a sync and an
+    # async implementation: bi_graph.invoke() uses `run`, ainvoke() uses `arun`.
+    if arun is None:
+        return traced(stage, timed(stage, guard(stage, run)))
+    return RunnableLambda(traced(stage, timed(stage, guard(stage, run))), afunc=atraced(stage, atimed(stage, aguard(stage, arun))))
+
+# Router and SQL generation are pure functions of these keys plus the DB
+# schema (apart from the LLM call itself), so repeats skip the Groq round-trip.
+# mem0 memories are advisory context and deliberately not part of the key.
+_memo_router = memoize("router", reads=("tenant_id", "question", "history"),
+                       writes=("corrected_question", "metadata"), version=execute_agent.schema_version)
+_memo_sql = memoize("sql", reads=("tenant_id", "question", "corrected_question", "history", "metadata"),
+                    writes=("sql", "sql_source"), version=execute_agent.schema_version)
+
+def _execute_failed(state):
+    # SQL that failed to execute must not be served again: demote it from the
+    # learned tier and drop the memoized routing and SQL that produced it
+    sql_agent.learn(state, False, execute_agent.schema_version())
+    _memo_router.forget(state)
+    _memo_sql.forget(state)
+
+# Execution outcome of generated SQL feeds the learned vault tier
+def _execute_run(state):
+    try:
+        state = execute_agent.run(state)
+    except DeadlineExceeded:
+        raise  # Out of budget says nothing about the SQL
+    except Exception:
+        _execute_failed(state)
+        raise
+    sql_agent.learn(state, True, execute_agent.schema_version())
+    return state
+
+async def _execute_arun(state):
+    try:
+        state = await execute_agent.arun(state)
+    except DeadlineExceeded:
+        raise  # Out of budget says nothing about the SQL
+    except Exception:
+        _execute_failed(state)
+        raise
+    sql_agent.learn(state, True, execute_agent.schema_version())
+    return state
+
+def _bi_run(state):
+    return cache_agent.store(bi_agent.run(state))
+
+async def _bi_arun(state):
+    return cache_agent.store(await bi_agent.arun(state))
+
+def _after_cache(state):
+    # Valid cached response -> done, nothing else runs
+    return END if state.get("cache_hit") else "metadata"
+
+def _after_metadata(state):
+    # Vault hit: metadata_agent already loaded certified (or learned) SQL, so retrieval,
+    # generation and impact review are skipped. Otherwise memory search, the
+    # table router and retrieval are independent: run them as parallel
+    # branches that join at sql, so the slowest one sets the critical path.
+    return "execute" if state.get("sql") else ["memory", "router", "rag"]
 
 graph = StateGraph(BIState)
-graph.add_node("metadata", metadata_agent.run)
-graph.add_node("rag", rag_agent.run)
-graph.add_node("sql", sql_agent.run)
-graph.add_node("impact", impact_agent.run)
-graph.add_node("execute", execute_agent.run)
-graph.add_node("bi", bi_agent.run)
-
-graph.set_entry_point("metadata")
-graph.add_edge("metadata", "rag")
-graph.add_edge("rag", "sql")
+graph.add_node("cache", _node("cache", cache_agent.run))
+graph.add_node("metadata", _node("metadata", metadata_agent.run))
+graph.add_node("memory", _node("memory", memory_agent.run, memory_agent.arun))
+graph.add_node("router", _node("router", _memo_router(metadata_agent.route), _memo_router(metadata_agent.aroute)))
+graph.add_node("rag", _node("rag", rag_agent.run))
+graph.add_node("sql", _node("sql", _memo_sql(sql_agent.run), _memo_sql(sql_agent.arun)))
+graph.add_node("impact", _node("impact", impact_agent.run))
+graph.add_node("execute", _node("execute", _execute_run, _execute_arun))
+graph.add_node("bi", _node("bi", _bi_run, _bi_arun))
+
+graph.set_entry_point("cache")
+graph.add_conditional_edges("cache", _after_cache, {END: END, "metadata": "metadata"})
+graph.add_conditional_edges("metadata", _after_metadata, ["execute", "memory", "router", "rag"])
+graph.add_edge(["memory", "router", "rag"], "sql")
 graph.add_edge("sql", "impact")
 graph.add_edge("impact", "execute")
 graph.add_edge("execute", "bi")
+graph.add_edge("bi", END)
 
 bi_graph = graph.compile()
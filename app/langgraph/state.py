@@ -1,4 +1,5 @@
-from typing import TypedDict, Any, List
+import operator
+from typing import TypedDict, Annotated, Any, List
 
 class BIState(TypedDict):
     tenant_id: str
@@ -8,6 +9,16 @@ class BIState(TypedDict):
     history: List[Any]
     metadata: dict
     rag_context: str
+    memory_context: List[str] # Relevant mem0 memories for this user (memory branch)
+    vault_match: dict # {"entry", "type"} - the request's vault lookup, done once (see vault.vault_match)
     sql: str
+    sql_source: str # Where sql came from: vault | learned | llm | fallback
+    sql_params: dict # Bound parameters for a vault template's SQL (:name placeholders)
     result: Any
+    result_truncated: bool # True when execute_agent hit EXECUTE_MAX_ROWS
     response: dict
+    deadline: float # Absolute time.time() by which the request must finish
+    warmup: bool # Startup warm-up run: fill caches but skip memory writes
+    cache_key: List[Any] # Response cache key, fixed before the graph executes anything
+    cache_hit: bool # True when the cache node answered and the run ended early
+    trace: Annotated[List[dict], operator.add] # One span per finished node (appended, parallel-safe)
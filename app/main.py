@@ -1,20 +1,618 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse, JSONResponse, PlainTextResponse
 from app.langgraph.graph import bi_graph
+from app.langgraph.checkpoint import checkpoints
 from app.billing.metering import record_usage
+from app.agents.vault import vault_match, avault_match, normalize_question, vault_store
+from app.agents.learned_vault import learned_vault
+from app.agents.cache_agent import request_key, stored_result, check as check_cache
+from app.cache.response_cache import response_cache
+from app.cache.single_flight import single_flight
+from app.cache.node_memo import node_memo
+from app.cache.result_store import ColumnarResult, result_store, parse_cursor, paginate
+from app.serving.result_encoding import negotiate, encode_response
+from app.serving.admission import admission, AdmissionRejected
+from app.langgraph.deadline import DeadlineExceeded, check, remaining
+from app.observability.metrics import registry
+from app.observability.tracing import build_trace, trace_store
+from app.memory.mem0_client import warm_up_in_background
+from app.serving.warmup import warmup_state, run_warmup, mark_ready_without_warmup
+from app.serving.jobs import job_manager, JobQueueFull
+from app.memory.session_store import session_store, compact_history
+from app.config import (
+    STREAM_CHUNK_ROWS, BATCH_MAX_WORKERS, BATCH_MAX_QUESTIONS, RESULT_PAGE_SIZE,
+    REQUEST_TIMEOUT_SECONDS, REQUEST_TIMEOUT_MAX_SECONDS, MEMORY_WARMUP, WARMUP_ON_STARTUP, JOB_TIMEOUT_SECONDS,
+)
+from contextlib import asynccontextmanager
 from dotenv import load_dotenv
+import asyncio
+import json
+import math
 import os
+import time
 
 load_dotenv()
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app):
+    # Heavy dependencies (mem0, embedder, SQLAlchemy, Groq client) load
+    # lazily; optionally start loading mem0 in the background right away
+    if MEMORY_WARMUP == "background":
+        warm_up_in_background()
+
+    # Warm-up runs in the background; /ready flips to 200 once it completes
+    warmup_task = None
+    if WARMUP_ON_STARTUP:
+        warmup_task = asyncio.create_task(run_warmup(_warmup_answer))
+    else:
+        mark_ready_without_warmup()
+    await checkpoints.open()
+    job_manager.start(_run_job)
+    vault_store.start_watcher()
+    yield
+    if warmup_task is not None:
+        warmup_task.cancel()
+    vault_store.stop_watcher()
+    await job_manager.stop()
+    await checkpoints.close()
+
+app = FastAPI(lifespan=lifespan)
+
+REQUESTS = registry.counter("agentic_bi_requests_total", "API requests by endpoint and outcome")
+
+def _cache_samples():
+    snap = response_cache.snapshot()
+    flight = single_flight.snapshot()
+    samples = [({"cache": "response", "stat": k}, snap[k]) for k in ("hits", "misses", "evictions", "expirations", "invalidations", "entries", "bytes")]
+    samples += [({"cache": "single_flight", "stat": k}, flight[k]) for k in ("executions", "coalesced", "in_flight")]
+    return samples
+
+def _admission_samples():
+    samples = []
+    for tenant_id, t in admission.snapshot()["tenants"].items():
+        samples.append(({"tenant": tenant_id, "stat": "active"}, t["active"]))
+        for lane, depth in t["queue_depth"].items():
+            samples.append(({"tenant": tenant_id, "stat": f"queue_depth_{lane}"}, depth))
+        for k in ("admitted", "rejected", "timed_out", "wait_seconds_total", "wait_seconds_max"):
+            samples.append(({"tenant": tenant_id, "stat": k}, t[k]))
+    return samples
+
+registry.gauge_callback("agentic_bi_cache", "Response cache and single-flight counters", _cache_samples)
+def _memo_samples():
+    samples = []
+    for node, s in node_memo.snapshot()["nodes"].items():
+        for k in ("hits", "disk_hits", "misses", "hit_rate"):
+            samples.append(({"node": node, "stat": k}, s[k]))
+    return samples
+
+# Memoized router/SQL output was produced against the old certified
+# questions, so a new vault version starts from a clean memo
+vault_store.on_reload(node_memo.clear)
+
+registry.gauge_callback("agentic_bi_node_memo", "Per-node memoization hits, misses and hit rate", _memo_samples)
+registry.gauge_callback("agentic_bi_admission", "Per-tenant admission slots, queue depth and wait time", _admission_samples)
+
+def _job_samples():
+    snap = job_manager.snapshot()
+    samples = [({"stat": "queued"}, snap["queued"]), ({"stat": "workers"}, snap["workers"])]
+    samples += [({"stat": status}, count) for status, count in snap["jobs"].items()]
+    return samples
+
+registry.gauge_callback("agentic_bi_jobs", "Background job queue depth and retained jobs by status", _job_samples)
+
+def _graph_input(payload):
+    # Request-level bookkeeping fields stay out of the graph state
+    return {k: v for k, v in payload.items() if not k.startswith("_") and k != "request_id"}
+
+async def _graph_run(payload):
+    # (graph, input, config). With a request_id the run is checkpointed, and a
+    # retry with the same id resumes from the node that failed.
+    if payload.get("request_id") and checkpoints.graph is not None:
+        graph_input, config = await checkpoints.plan(_graph_input(payload), payload["request_id"])
+        return checkpoints.graph, graph_input, config
+    return bi_graph, _graph_input(payload), None
+
+def _lane(payload):
+    # Admission priority lane; interactive unless the caller marks itself batch
+    return "batch" if payload.get("priority") == "batch" else "interactive"
+
+class InvalidRequest(ValueError):
+    """Malformed request field; maps to HTTP 400."""
+
+def _positive(payload, field, cast, default):
+    # Optional numeric request field: missing/null -> default, anything that
+    # isn't a positive finite number -> InvalidRequest
+    value = payload.get(field)
+    if value is None or value == "":
+        return default
+    try:
+        number = cast(value)
+    except (TypeError, ValueError, OverflowError):
+        number = None
+    if isinstance(value, bool) or number is None or not math.isfinite(number) or number <= 0:
+        raise InvalidRequest(f"'{field}' must be a positive number, got {value!r}")
+    return number
+
+def _with_deadline(payload):
+    # Stamp the request with an absolute deadline that every node enforces.
+    # Callers may ask for a different budget via timeout_seconds (capped).
+    budget = min(_positive(payload, "timeout_seconds", float, REQUEST_TIMEOUT_SECONDS), REQUEST_TIMEOUT_MAX_SECONDS)
+    payload.pop("timeout_seconds", None)
+    payload["deadline"] = time.time() + budget
+    payload["_budget_seconds"] = budget
+    return payload
+
+def _with_session(payload):
+    # With a session_id the server owns the conversation: history comes from
+    # the session store and the client only sends the new question. Without
+    # one, client-supplied history is still clipped to keep prompts bounded.
+    session_id = payload.pop("session_id", None)
+    if session_id:
+        session = session_store.get_or_create(payload["tenant_id"], session_id, payload.get("user_id"))
+        payload["history"] = session_store.history(session)
+        payload["_session"] = session
+    else:
+        payload["history"] = compact_history(payload.get("history"))
+    return payload
+
+def _remember(payload, response):
+    session = payload.get("_session")
+    if session is not None:
+        session_store.record(session, payload["question"], response)
+        return {**response, "session_id": session["session_id"]}
+    return response
+
+def _timeout_body(e, payload):
+    budget = payload.get("_budget_seconds")
+    return {
+        "error": str(e),
+        "status": "timeout",
+        "stage": e.stage,
+        "budget_seconds": budget,
+        "elapsed_seconds": round(budget - remaining(payload), 3) if budget is not None else None,
+    }
+
+def _timed_out(e, payload):
+    return JSONResponse(_timeout_body(e, payload), status_code=504)
+
+def _invalid(e):
+    return JSONResponse({"error": str(e), "status": "failed"}, status_code=400)
+
+def _rejected(e):
+    return JSONResponse(
+        {"error": str(e), "status": "rejected", "retry_after": e.retry_after},
+        status_code=429,
+        headers={"Retry-After": str(e.retry_after)},
+    )
+
+async def _answer(payload, lane="interactive"):
+    # Shared by /ask and /ask/batch: response cache, then single-flight
+    # coalescing of identical in-flight questions, then a per-tenant admission
+    # slot, then bi_graph.ainvoke (whose bi node fills the cache)
+    # The run's trace (if any) is left in payload["_trace"]
+    payload["_trace"] = None
+    await avault_match(payload)
+    cached = check_cache(payload)
+    if cached is not None:
+        return cached
+
+    async def run_graph():
+        try:
+            async with admission.slot(payload["tenant_id"], lane, timeout=remaining(payload)):
+                graph, graph_input, config = await _graph_run(payload)
+                result = await graph.ainvoke(graph_input, config)
+        except AdmissionRejected:
+            check(payload, "admission")  # Queued past the deadline -> timeout, not 429
+            raise
+        await checkpoints.release(config)
+        trace = build_trace(result)
+        trace_store.write(trace)
+        return {"response": result["response"], "trace": trace}
+
+    out = await single_flight.do(request_key(payload), run_graph)
+    payload["_trace"] = out["trace"]
+    return out["response"]
+
+async def _warmup_answer(payload):
+    payload["timeout_seconds"] = REQUEST_TIMEOUT_MAX_SECONDS
+    return await _answer(_with_deadline(payload), lane="batch")
+
+async def _admit_job(payload):
+    # Jobs may queue for a slot for their whole budget (not just the interactive
+    # max wait); a full tenant queue means try again later, not a failed job
+    while True:
+        try:
+            await admission.acquire(payload["tenant_id"], "batch", timeout=remaining(payload), max_wait=remaining(payload))
+            return
+        except AdmissionRejected as e:
+            check(payload, "admission")  # Budget spent -> timeout
+            await asyncio.sleep(min(e.retry_after, remaining(payload)))
+
+async def _run_job(payload, on_start, on_node):
+    # Background job body: same cache / admission path as /ask, but streamed so
+    # every finished node is reported as progress while the job runs. The job
+    # stays "queued" until it is admitted.
+    await avault_match(payload)
+    cached = check_cache(payload)
+    if cached is not None:
+        on_start()
+        on_node("cache")
+        return _remember(payload, cached)
+
+    final, spans = None, []
+    await _admit_job(payload)
+    on_start()
+    admitted_at = time.perf_counter()
+    try:
+        graph, graph_input, config = await _graph_run(payload)
+        async for update in graph.astream(graph_input, config, stream_mode="updates"):
+            for node, state in update.items():
+                on_node(node)
+                spans += state.get("trace") or []
+                final = state
+    finally:
+        admission.release(payload["tenant_id"], time.perf_counter() - admitted_at)
+    await checkpoints.release(config)
+    trace_store.write(build_trace(payload, spans))
+    return _remember(payload, final["response"])
 
 @app.post("/ask")
-def ask(payload: dict):
+async def ask(payload: dict, request: Request, trace: bool = False):
+    # Native async path: the request never holds a threadpool slot while
+    # waiting on Groq / mem0 / the database.
+    # Result layout is negotiated via Accept: rows (default), columnar JSON or Arrow IPC.
+    # ?trace=true adds the per-node trace (None when served from cache).
     try:
-        result = bi_graph.invoke(payload)
+        response = _remember(payload, await _answer(_with_session(_with_deadline(payload)), _lane(payload)))
+        if trace:
+            response = {**response, "trace": payload["_trace"]}
         record_usage(payload["tenant_id"], "query", 1)
-        return result["response"]
+        REQUESTS.inc(endpoint="/ask", outcome="ok")
+        return encode_response(response, negotiate(request.headers.get("accept")))
+    except InvalidRequest as e:
+        REQUESTS.inc(endpoint="/ask", outcome="invalid")
+        return _invalid(e)
+    except AdmissionRejected as e:
+        REQUESTS.inc(endpoint="/ask", outcome="rejected")
+        return _rejected(e)
+    except DeadlineExceeded as e:
+        REQUESTS.inc(endpoint="/ask", outcome="timeout")
+        return _timed_out(e, payload)
     except Exception as e:
+        REQUESTS.inc(endpoint="/ask", outcome="failed")
         import traceback
         traceback.print_exc()
         return {"error": str(e), "status": "failed"}
+
+def _sse(event, data):
+    # default=str keeps dates/Decimals from non-SQLite backends serializable
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+def _row_events(result):
+    # Rows are materialized one chunk at a time, straight from the columnar store
+    for offset in range(0, len(result), STREAM_CHUNK_ROWS):
+        yield _sse("rows", {"offset": offset, "rows": result.rows(offset, offset + STREAM_CHUNK_ROWS)})
+
+def _replay_events(payload, cached):
+    # Cache hit: replay the stored answer in the same event shape
+    yield _sse("cache", {"hit": True})
+    yield _sse("sql", {"sql": cached["sql"], "params": cached.get("sql_params") or {}})
+    result = stored_result(cached, payload["tenant_id"]) if cached.get("next_cursor") else ColumnarResult.from_rows(cached["data"])
+    for event in _row_events(result):
+        yield event
+    yield _sse("result", {**{k: v for k, v in _remember(payload, cached).items() if k != "data"}, "row_count": len(result)})
+
+class _AdmittedStreamingResponse(StreamingResponse):
+    # Owns the admission slot taken by /ask/stream: it goes back when the
+    # response ends for any reason, including a client that disconnects
+    # before the first chunk (when the generator never even starts)
+    def __init__(self, content, tenant_id, **kwargs):
+        super().__init__(content, **kwargs)
+        self.tenant_id = tenant_id
+        self.admitted_at = time.perf_counter()
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            admission.release(self.tenant_id, time.perf_counter() - self.admitted_at)
+
+async def _stream_events(payload, cached):
+    # Without a cache hit the response object holds an admission slot for us
+    start = time.perf_counter()
+    try:
+        if cached is not None:
+            for event in _replay_events(payload, cached):
+                yield event
+            record_usage(payload["tenant_id"], "query", 1)
+            REQUESTS.inc(endpoint="/ask/stream", outcome="ok")
+            yield _sse("done", {"elapsed_ms": round((time.perf_counter() - start) * 1000, 1)})
+            return
+
+        spans = []
+        graph, graph_input, config = await _graph_run(payload)
+        async for update in graph.astream(graph_input, config, stream_mode="updates"):
+            for node, state in update.items():
+                yield _sse("node", {"node": node, "elapsed_ms": round((time.perf_counter() - start) * 1000, 1)})
+                spans += state.get("trace") or []
+
+                if node == "sql" or (node == "metadata" and state.get("sql")):
+                    # Ship the SQL as soon as it exists, before it is executed.
+                    # Vault/learned hits have it after metadata and skip sql.
+                    yield _sse("sql", {"sql": state["sql"], "params": state.get("sql_params") or {}})
+                elif node == "execute":
+                    for event in _row_events(result_store.get(state["result"]["result_id"], payload["tenant_id"])):
+                        yield event
+                elif node == "bi":
+                    # Rows were already streamed above; send everything else
+                    response = {k: v for k, v in _remember(payload, state["response"]).items() if k != "data"}
+                    response["row_count"] = state["result"]["row_count"]
+                    yield _sse("result", response)
+
+        await checkpoints.release(config)
+        trace = build_trace(payload, spans)
+        trace_store.write(trace)
+        if trace is not None:
+            yield _sse("trace", trace)
+        record_usage(payload["tenant_id"], "query", 1)
+        REQUESTS.inc(endpoint="/ask/stream", outcome="ok")
+        yield _sse("done", {"elapsed_ms": round((time.perf_counter() - start) * 1000, 1)})
+    except DeadlineExceeded as e:
+        REQUESTS.inc(endpoint="/ask/stream", outcome="timeout")
+        yield _sse("error", _timeout_body(e, payload))
+    except Exception as e:
+        REQUESTS.inc(endpoint="/ask/stream", outcome="failed")
+        import traceback
+        traceback.print_exc()
+        yield _sse("error", {"error": str(e), "status": "failed"})
+
+@app.post("/ask/stream")
+async def ask_stream(payload: dict):
+    # Server-Sent Events: one event per finished LangGraph node, the SQL as soon
+    # as sql_agent produces it, then result rows in chunks.
+    try:
+        _with_deadline(payload)
+    except InvalidRequest as e:
+        REQUESTS.inc(endpoint="/ask/stream", outcome="invalid")
+        return _invalid(e)
+    _with_session(payload)
+    await avault_match(payload)
+    cached = check_cache(payload)
+    if cached is None:
+        # Take the admission slot before the 200 goes out so overload is a real 429
+        try:
+            await admission.acquire(payload["tenant_id"], _lane(payload), timeout=remaining(payload))
+        except AdmissionRejected as e:
+            if remaining(payload) <= 0:
+                REQUESTS.inc(endpoint="/ask/stream", outcome="timeout")
+                return _timed_out(DeadlineExceeded("admission"), payload)
+            REQUESTS.inc(endpoint="/ask/stream", outcome="rejected")
+            return _rejected(e)
+        return _AdmittedStreamingResponse(
+            _stream_events(payload, cached),
+            payload["tenant_id"],
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+    return StreamingResponse(
+        _stream_events(payload, cached),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+def _batch_key(item):
+    # Vault-equivalent phrasings (exact or fuzzy) share the certified SQL;
+    # template hits only when their slot values agree too
+    entry, _ = vault_match(item)
+    if entry:
+        return ("vault", entry["sql"], json.dumps(entry.get("params", {}), sort_keys=True))
+    return ("question", normalize_question(item["question"]))
+
+@app.post("/ask/batch")
+async def ask_batch(payload: dict):
+    # Runs a list of questions for one tenant concurrently (bounded), executing
+    # duplicate / vault-equivalent questions once. Results keep input order.
+    questions = payload.get("questions") or []
+    if not questions:
+        return {"error": "'questions' must be a non-empty list", "status": "failed"}
+    if len(questions) > BATCH_MAX_QUESTIONS:
+        return {"error": f"Batch too large: {len(questions)} > {BATCH_MAX_QUESTIONS}", "status": "failed"}
+    try:
+        _positive(payload, "timeout_seconds", float, None)  # Applied per item below
+        workers = min(_positive(payload, "max_workers", int, BATCH_MAX_WORKERS), BATCH_MAX_WORKERS)
+    except InvalidRequest as e:
+        return _invalid(e)
+    semaphore = asyncio.Semaphore(workers)
+
+    # 1. Dedup: first occurrence of each key owns the execution
+    # The vault match made here travels with each item into _answer
+    matched = [{"question": q} for q in questions]
+    await asyncio.gather(*(avault_match(item) for item in matched))
+    keys = [_batch_key(item) for item in matched]
+    owners = {}
+    for idx, key in enumerate(keys):
+        owners.setdefault(key, idx)
+
+    async def run_one(idx):
+        async with semaphore:
+            start = time.perf_counter()
+            # Each item gets its own budget, starting when it leaves the batch queue
+            item = _with_deadline({
+                "tenant_id": payload["tenant_id"],
+                "user_id": payload.get("user_id", "batch"),
+                "question": questions[idx],
+                "history": compact_history(payload.get("history")),
+                "timeout_seconds": payload.get("timeout_seconds"),
+                "vault_match": matched[idx]["vault_match"],
+            })
+            try:
+                response = await _answer(item, lane="batch")
+                outcome = {"status": "ok", "response": response}
+            except AdmissionRejected as e:
+                outcome = {"status": "rejected", "error": str(e), "retry_after": e.retry_after}
+            except DeadlineExceeded as e:
+                outcome = _timeout_body(e, item)
+            except Exception as e:
+                print(f"[BATCH] Question {idx} failed: {e}")
+                outcome = {"status": "failed", "error": str(e)}
+            outcome["elapsed_ms"] = round((time.perf_counter() - start) * 1000, 1)
+            return outcome
+
+    # 2. Fan out the unique questions
+    unique = sorted(set(owners.values()))
+    outcomes = dict(zip(unique, await asyncio.gather(*(run_one(i) for i in unique))))
+    record_usage(payload["tenant_id"], "query", len(unique))
+    for outcome in outcomes.values():
+        REQUESTS.inc(endpoint="/ask/batch", outcome=outcome["status"])
+
+    # 3. Reassemble in input order
+    results = []
+    for idx, question in enumerate(questions):
+        owner = owners[keys[idx]]
+        item = {"index": idx, "question": question, **outcomes[owner]}
+        if owner != idx:
+            item["deduplicated_from"] = owner
+        results.append(item)
+
+    return {
+        "tenant_id": payload["tenant_id"],
+        "total": len(questions),
+        "executed": len(unique),
+        "deduplicated": len(questions) - len(unique),
+        "results": results,
+    }
+
+@app.post("/jobs")
+async def submit_job(payload: dict):
+    # Long-running questions: enqueue and return a job id immediately; poll
+    # GET /jobs/{id} for progress and fetch GET /jobs/{id}/result when done.
+    # Jobs get JOB_TIMEOUT_SECONDS instead of the interactive request budget.
+    try:
+        budget = min(_positive(payload, "timeout_seconds", float, JOB_TIMEOUT_SECONDS), JOB_TIMEOUT_SECONDS)
+    except InvalidRequest as e:
+        REQUESTS.inc(endpoint="/jobs", outcome="invalid")
+        return _invalid(e)
+    payload.pop("timeout_seconds", None)
+    payload["_budget_seconds"] = budget
+    payload["deadline"] = time.time() + budget
+    _with_session(payload)
+    try:
+        job = job_manager.submit(payload)
+    except JobQueueFull as e:
+        REQUESTS.inc(endpoint="/jobs", outcome="rejected")
+        return JSONResponse({"error": str(e), "status": "rejected", "retry_after": 5}, status_code=429, headers={"Retry-After": "5"})
+    record_usage(payload["tenant_id"], "query", 1)
+    REQUESTS.inc(endpoint="/jobs", outcome="accepted")
+    return JSONResponse({"job_id": job["job_id"], "status": job["status"]}, status_code=202)
+
+@app.get("/jobs/{job_id}")
+def get_job(job_id: str, tenant_id: str):
+    job = job_manager.get(job_id, tenant_id)
+    if job is None:
+        return JSONResponse({"error": "Job not found or expired", "status": "failed"}, status_code=404)
+    return job
+
+@app.get("/jobs/{job_id}/result")
+def get_job_result(job_id: str, tenant_id: str, request: Request):
+    job = job_manager.get(job_id, tenant_id)
+    if job is None:
+        return JSONResponse({"error": "Job not found or expired", "status": "failed"}, status_code=404)
+    if job["status"] in ("queued", "running"):
+        return JSONResponse({"job_id": job_id, "status": job["status"]}, status_code=409)
+    if job["status"] != "succeeded":
+        return JSONResponse({"job_id": job_id, "status": job["status"], "error": job.get("error"), "stage": job.get("stage")}, status_code=500 if job["status"] == "failed" else 504)
+    return encode_response(job_manager.result(job_id), negotiate(request.headers.get("accept")))
+
+@app.post("/sessions")
+def create_session(payload: dict):
+    # Optional: clients may also just pick their own session_id on /ask
+    session = session_store.get_or_create(payload["tenant_id"], user_id=payload.get("user_id"))
+    return {"session_id": session["session_id"]}
+
+@app.get("/sessions/{session_id}")
+def get_session(session_id: str, tenant_id: str):
+    session = session_store.get(tenant_id, session_id)
+    if session is None:
+        return JSONResponse({"error": "Session not found or expired", "status": "failed"}, status_code=404)
+    return session_store.snapshot(session)
+
+@app.delete("/sessions/{session_id}")
+def delete_session(session_id: str, tenant_id: str):
+    return {"deleted": session_store.delete(tenant_id, session_id)}
+
+@app.get("/health")
+def health():
+    # Liveness: the process is up (it may still be warming up)
+    return {"status": "ok"}
+
+@app.get("/ready")
+def ready():
+    # Readiness: 503 until the startup warm-up has finished successfully
+    return JSONResponse(warmup_state.snapshot(), status_code=200 if warmup_state.ready else 503)
+
+@app.get("/metrics")
+def metrics():
+    # Prometheus text exposition format; served from process memory, so it works
+    # with or without a Prometheus server scraping it
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/traces")
+def recent_traces(tenant_id: str = None, limit: int = 50):
+    # Newest-first traces from the local JSONL trace store
+    return {"traces": trace_store.recent(max(1, min(limit, 500)), tenant_id)}
+
+@app.get("/admission/stats")
+def admission_stats():
+    return admission.snapshot()
+
+@app.get("/cache/stats")
+def cache_stats():
+    return {**response_cache.snapshot(), "single_flight": single_flight.snapshot(), "node_memo": node_memo.snapshot()}
+
+@app.post("/cache/invalidate")
+def cache_invalidate(payload: dict):
+    # Called after writes (e.g. the manual sales entry form). Optional filters:
+    # tenant_id and tables; with neither, the whole cache is cleared.
+    removed = response_cache.invalidate(payload.get("tenant_id"), payload.get("tables"))
+    print(f"[CACHE] Invalidated {removed} entries (tenant={payload.get('tenant_id')}, tables={payload.get('tables')})")
+    if not payload.get("tenant_id") and not payload.get("tables"):
+        # Full invalidation also drops memoized router/SQL output (its keys
+        # are hashed, so it can't be filtered by tenant or table)
+        memo_removed = node_memo.clear()
+        print(f"[CACHE] Cleared {memo_removed} memoized node results")
+        return {"invalidated": removed, "memo_cleared": memo_removed}
+    return {"invalidated": removed}
+
+@app.get("/vault")
+def vault_info():
+    return {**vault_store.info(), "learned": learned_vault.snapshot()}
+
+@app.delete("/vault/learned")
+def vault_learned_clear(tenant_id: str = None):
+    # Forget promoted LLM SQL (all tenants, or one); it is relearned on use
+    removed = learned_vault.clear(tenant_id)
+    print(f"[LEARNED] Cleared {removed} learned questions (tenant={tenant_id})")
+    return {"cleared": removed}
+
+@app.post("/vault/reload")
+async def vault_reload(payload: dict = None):
+    # Admin-triggered reload of VAULT_PATH (the watcher does the same on file
+    # changes). Indexes are rebuilt in a worker thread; lookups keep using the
+    # current version until the new one is swapped in.
+    changed, info = await asyncio.to_thread(vault_store.reload, bool((payload or {}).get("force")))
+    if vault_store.stats["last_error"]:
+        return JSONResponse({"error": vault_store.stats["last_error"], "status": "failed", "vault": info}, status_code=422)
+    return {"reloaded": changed, "vault": info}
+
+@app.get("/results/{cursor}")
+def get_results_page(cursor: str, tenant_id: str, request: Request, page_size: int = RESULT_PAGE_SIZE):
+    # Further pages of a large /ask result, addressed by the response's next_cursor
+    parsed = parse_cursor(cursor)
+    if parsed is None:
+        return JSONResponse({"error": "Malformed cursor", "status": "failed"}, status_code=400)
+    result_id, offset = parsed
+    result = result_store.get(result_id, tenant_id)
+    if result is None:
+        return JSONResponse({"error": "Result expired or not found - re-run the question", "status": "failed"}, status_code=410)
+    page = paginate(result, result_id, offset, max(1, min(page_size, RESULT_PAGE_SIZE)))
+    return encode_response(page, negotiate(request.headers.get("accept")))
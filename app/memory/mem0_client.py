@@ -1,5 +1,5 @@
 import os
-from mem0 import Memory
+import threading
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -31,26 +31,56 @@ config = {
     }
 }
 
-memory = None
-try:
-    if groq_key:
-        print(f"[MEMORY] Initializing with key: {groq_key[:5]}...")
-        memory = Memory.from_config(config)
-        print("[MEMORY] Mem0 initialized successfully with real provider.")
-    else:
+# Provide a mock memory object if init fails to prevent crashes
+class MockMemory:
+    def add(self, *args, **kwargs): 
+        print("[MEMORY-MOCK] Add ignored (Initialization failed)")
+        pass
+    def search(self, *args, **kwargs): 
+        print("[MEMORY-MOCK] Search returned [] (Initialization failed)")
+        return []
+
+def _init_memory():
+    try:
+        if groq_key:
+            print(f"[MEMORY] Initializing with key: {groq_key[:5]}...")
+            # Deferred import: mem0 pulls in the Qdrant client and the
+            # sentence-transformers embedder, the bulk of cold-start time
+            from mem0 import Memory
+            instance = Memory.from_config(config)
+            print("[MEMORY] Mem0 initialized successfully with real provider.")
+            return instance
         print("[MEMORY] GROQ_API_KEY missing or invalid - Using Mock Memory.")
-except Exception as e:
-    print(f"[MEMORY] CRITICAL: Initialization failed: {e}")
-    import traceback
-    traceback.print_exc()
+    except Exception as e:
+        print(f"[MEMORY] CRITICAL: Initialization failed: {e}")
+        import traceback
+        traceback.print_exc()
+    return MockMemory()
 
-# Provide a mock memory object if init fails to prevent crashes
-if memory is None:
-    class MockMemory:
-        def add(self, *args, **kwargs): 
-            print("[MEMORY-MOCK] Add ignored (Initialization failed)")
-            pass
-        def search(self, *args, **kwargs): 
-            print("[MEMORY-MOCK] Search returned [] (Initialization failed)")
-            return []
-    memory = MockMemory()
+_memory = None
+_init_lock = threading.Lock()
+
+def get_memory():
+    # Initialized on first use (or by warm_up_in_background); thread-safe
+    global _memory
+    if _memory is None:
+        with _init_lock:
+            if _memory is None:
+                _memory = _init_memory()
+    return _memory
+
+def warm_up_in_background():
+    # Load mem0 + embedder off the request path so the first query doesn't pay for it
+    thread = threading.Thread(target=get_memory, name="mem0-warmup", daemon=True)
+    thread.start()
+    return thread
+
+class _LazyMemory:
+    # Keeps `from app.memory.mem0_client import memory` working while the real
+    # client is only built when an agent first touches it
+    def add(self, *args, **kwargs):
+        return get_memory().add(*args, **kwargs)
+    def search(self, *args, **kwargs):
+        return get_memory().search(*args, **kwargs)
+
+memory = _LazyMemory()
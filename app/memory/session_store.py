@@ -0,0 +1,99 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+
+from app.config import SESSION_TTL_SECONDS, SESSION_MAX_SESSIONS, SESSION_MAX_TURNS, SESSION_TURN_MAX_CHARS
+
+def _clip(text, limit=SESSION_TURN_MAX_CHARS):
+    text = " ".join(str(text or "").split())
+    return text if len(text) <= limit else text[:limit - 3] + "..."
+
+def compact_history(history, max_turns=SESSION_MAX_TURNS):
+    # Bound client-supplied history the same way as session history: last
+    # max_turns exchanges (two lines each), every line clipped
+    return [_clip(line) for line in (history or [])[-2 * max_turns:]]
+
+class SessionStore:
+    """
+    Server-side conversation state, keyed by (tenant_id, session_id), so clients
+    send only the new question. Each session keeps a bounded window of compact
+    turns (question, SQL, clipped answer) plus the last SQL and a reference to
+    the last result (its cursor), never the rows themselves. Idle sessions expire
+    after a TTL; the store is capped at max_sessions (least recently used first).
+    """
+
+    def __init__(self, ttl_seconds, max_sessions, max_turns):
+        self.ttl_seconds = ttl_seconds
+        self.max_sessions = max_sessions
+        self.max_turns = max_turns
+        self._sessions = OrderedDict()  # (tenant_id, session_id) -> session dict
+        self._lock = threading.Lock()
+
+    def _new(self, tenant_id, session_id, user_id):
+        return {
+            "session_id": session_id,
+            "tenant_id": tenant_id,
+            "user_id": user_id,
+            "turns": deque(maxlen=self.max_turns),
+            "last_sql": None,
+            "last_result": None,
+            "updated_at": time.time(),
+        }
+
+    def get_or_create(self, tenant_id, session_id=None, user_id=None):
+        # Unknown ids (e.g. after a restart) start a fresh session under that id
+        session_id = session_id or uuid.uuid4().hex
+        key = (tenant_id, session_id)
+        with self._lock:
+            self._purge_expired()
+            session = self._sessions.get(key)
+            if session is None:
+                session = self._sessions[key] = self._new(tenant_id, session_id, user_id)
+                while len(self._sessions) > self.max_sessions:
+                    self._sessions.popitem(last=False)
+            self._sessions.move_to_end(key)
+            session["updated_at"] = time.time()
+            return session
+
+    def get(self, tenant_id, session_id):
+        with self._lock:
+            self._purge_expired()
+            return self._sessions.get((tenant_id, session_id))
+
+    def delete(self, tenant_id, session_id):
+        with self._lock:
+            return self._sessions.pop((tenant_id, session_id), None) is not None
+
+    def history(self, session):
+        # Prompt-ready history: two short lines per remembered turn
+        lines = []
+        for turn in list(session["turns"]):
+            lines.append(f"User: {turn['question']}")
+            lines.append(f"AI: {turn['answer']} (SQL: {turn['sql']})")
+        return lines
+
+    def record(self, session, question, response):
+        with self._lock:
+            session["turns"].append({
+                "question": _clip(question),
+                "sql": _clip(response.get("sql")),
+                "answer": _clip(response.get("reasoning")),
+            })
+            session["last_sql"] = response.get("sql")
+            session["last_result"] = {
+                "total_rows": response.get("total_rows"),
+                "next_cursor": response.get("next_cursor"),
+                "kpis": response.get("kpis"),
+            }
+            session["updated_at"] = time.time()
+
+    def snapshot(self, session):
+        return {**session, "turns": list(session["turns"])}
+
+    def _purge_expired(self):
+        cutoff = time.time() - self.ttl_seconds
+        for key in [k for k, s in self._sessions.items() if s["updated_at"] < cutoff]:
+            del self._sessions[key]
+
+session_store = SessionStore(SESSION_TTL_SECONDS, SESSION_MAX_SESSIONS, SESSION_MAX_TURNS)
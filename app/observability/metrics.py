@@ -0,0 +1,167 @@
+import threading
+import time
+from contextlib import contextmanager
+
+# In-process metrics registry rendered in the Prometheus text format at /metrics.
+# No client library or collector is needed: everything lives in this process
+# and is scraped (or just curl'ed) on demand.
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+ROW_BUCKETS = (0, 1, 10, 100, 1000, 10000, 100000)
+
+def _label_key(labels):
+    return tuple(sorted(labels.items()))
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _format_labels(pairs):
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+def _format_value(value):
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+class Counter:
+    def __init__(self, name, help_text):
+        self.name, self.help_text = name, help_text
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(key)} {_format_value(value)}")
+        return lines
+
+class Histogram:
+    def __init__(self, name, help_text, buckets=DEFAULT_BUCKETS):
+        self.name, self.help_text = name, help_text
+        self.buckets = tuple(buckets)
+        self._series = {}  # label key -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            series = self._series.setdefault(key, [0] * len(self.buckets) + [0.0, 0])
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, series in sorted(self._series.items()):
+                for bound, count in zip(self.buckets, series):
+                    lines.append(f"{self.name}_bucket{_format_labels(key + (('le', _format_value(bound)),))} {count}")
+                lines.append(f"{self.name}_bucket{_format_labels(key + (('le', '+Inf'),))} {series[-1]}")
+                lines.append(f"{self.name}_sum{_format_labels(key)} {_format_value(series[-2])}")
+                lines.append(f"{self.name}_count{_format_labels(key)} {series[-1]}")
+        return lines
+
+class GaugeCallback:
+    # Sampled at scrape time, e.g. cache sizes and admission queue depth.
+    # fn returns a list of (labels dict, value) pairs.
+    def __init__(self, name, help_text, fn):
+        self.name, self.help_text, self.fn = name, help_text, fn
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} gauge"]
+        try:
+            samples = self.fn()
+        except Exception as e:
+            print(f"[METRICS] Gauge {self.name} failed: {e}")
+            samples = []
+        for labels, value in samples:
+            lines.append(f"{self.name}{_format_labels(_label_key(labels))} {_format_value(value)}")
+        return lines
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+
+    def _add(self, metric):
+        return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name, help_text):
+        return self._add(Counter(name, help_text))
+
+    def histogram(self, name, help_text, buckets=DEFAULT_BUCKETS):
+        return self._add(Histogram(name, help_text, buckets))
+
+    def gauge_callback(self, name, help_text, fn):
+        self._metrics[name] = GaugeCallback(name, help_text, fn)
+
+    def render(self):
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+registry = Registry()
+
+# --- Pipeline metrics ---
+NODE_LATENCY = registry.histogram("agentic_bi_node_latency_seconds", "Latency of each LangGraph node")
+STAGE_ERRORS = registry.counter("agentic_bi_errors_total", "Errors by pipeline stage and exception type")
+VAULT_LOOKUPS = registry.counter("agentic_bi_vault_lookups_total", "Vault lookups by result (hit, fuzzy_hit, template_hit, semantic_hit, learned_hit, miss)")
+LLM_CALLS = registry.counter("agentic_bi_llm_calls_total", "Groq LLM calls by stage and outcome")
+LLM_LATENCY = registry.histogram("agentic_bi_llm_latency_seconds", "Groq LLM call latency by stage")
+SQL_LATENCY = registry.histogram("agentic_bi_sql_execution_seconds", "SQL execution time")
+SQL_ROWS = registry.histogram("agentic_bi_sql_rows_returned", "Rows returned per SQL execution", ROW_BUCKETS)
+MEMORY_LATENCY = registry.histogram("agentic_bi_memory_seconds", "mem0 latency by operation (add, search)")
+
+@contextmanager
+def llm_call(stage):
+    # Times one LLM round-trip and counts it as ok / error
+    start = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        LLM_CALLS.inc(stage=stage, outcome="error")
+        raise
+    finally:
+        LLM_LATENCY.observe(time.perf_counter() - start, stage=stage)
+    LLM_CALLS.inc(stage=stage, outcome="ok")
+
+def timed(stage, fn):
+    # Wraps a sync graph node with latency + error accounting
+    def run(state):
+        start = time.perf_counter()
+        try:
+            return fn(state)
+        except Exception as e:
+            STAGE_ERRORS.inc(stage=stage, error=type(e).__name__)
+            raise
+        finally:
+            NODE_LATENCY.observe(time.perf_counter() - start, node=stage)
+    return run
+
+def atimed(stage, fn):
+    async def arun(state):
+        start = time.perf_counter()
+        try:
+            return await fn(state)
+        except Exception as e:
+            STAGE_ERRORS.inc(stage=stage, error=type(e).__name__)
+            raise
+        finally:
+            NODE_LATENCY.observe(time.perf_counter() - start, node=stage)
+    return arun
@@ -0,0 +1,149 @@
+import contextvars
+import json
+import logging
+import os
+import time
+import uuid
+from logging.handlers import RotatingFileHandler
+
+from app.config import TRACE_ENABLED, TRACE_STORE_PATH, TRACE_STORE_MAX_BYTES, TRACE_STORE_BACKUPS
+
+# Span of the node currently running; agents add attributes through annotate()
+_current_span = contextvars.ContextVar("agentic_bi_span", default=None)
+
+def annotate(**attrs):
+    # Attach attributes (cache_hit, rows, ...) to the current node's span.
+    # Numeric attributes accumulate, so two LLM calls in one node add up.
+    span = _current_span.get()
+    if span is None:
+        return
+    for k, v in attrs.items():
+        if isinstance(v, (int, float)) and not isinstance(v, bool) and isinstance(span.get(k), (int, float)):
+            span[k] += v
+        else:
+            span[k] = v
+
+def record_llm(response):
+    # Token counts from a LangChain chat response, when the provider reports them
+    usage = getattr(response, "usage_metadata", None) or {}
+    if usage:
+        annotate(
+            llm_calls=1,
+            input_tokens=usage.get("input_tokens", 0),
+            output_tokens=usage.get("output_tokens", 0),
+            total_tokens=usage.get("total_tokens", 0),
+        )
+    else:
+        annotate(llm_calls=1)
+
+def _start(stage):
+    span = {"node": stage, "started_at": time.time()}
+    return span, _current_span.set(span)
+
+def _end(span, token, update, error=None):
+    span["duration_ms"] = round((time.time() - span["started_at"]) * 1000, 2)
+    if error is not None:
+        span["error"] = type(error).__name__
+    _current_span.reset(token)
+    if update is not None:
+        # Sequential nodes hand back the whole state (trace included); the
+        # trace channel appends, so a node only ever contributes its own span
+        update["trace"] = [span]
+    return update
+
+def traced(stage, fn):
+    # Wraps a sync graph node with a tracing span
+    if not TRACE_ENABLED:
+        return fn
+    def run(state):
+        span, token = _start(stage)
+        try:
+            update = fn(state)
+        except Exception as e:
+            _end(span, token, None, e)
+            raise
+        return _end(span, token, update)
+    return run
+
+def atraced(stage, fn):
+    if not TRACE_ENABLED:
+        return fn
+    async def arun(state):
+        span, token = _start(stage)
+        try:
+            update = await fn(state)
+        except Exception as e:
+            _end(span, token, None, e)
+            raise
+        return _end(span, token, update)
+    return arun
+
+def build_trace(state, spans=None):
+    # Per-request trace: spans ordered by start, with offsets for a waterfall
+    spans = sorted(spans if spans is not None else state.get("trace") or [], key=lambda s: s["started_at"])
+    if not spans:
+        return None
+    origin = spans[0]["started_at"]
+    end = max(s["started_at"] + s.get("duration_ms", 0) / 1000 for s in spans)
+    return {
+        "trace_id": uuid.uuid4().hex,
+        "tenant_id": state.get("tenant_id"),
+        "question": state.get("question"),
+        "started_at": origin,
+        "total_ms": round((end - origin) * 1000, 2),
+        "spans": [{**s, "offset_ms": round((s["started_at"] - origin) * 1000, 2)} for s in spans],
+    }
+
+class TraceStore:
+    """
+    Local JSONL trace log, one request per line, rotated by size
+    (traces.jsonl, traces.jsonl.1, ...). Writes go through logging's
+    RotatingFileHandler so concurrent requests never interleave lines.
+    """
+
+    def __init__(self, path, max_bytes, backups):
+        self.path = path
+        self._logger = logging.getLogger("agentic_bi.traces")
+        self._logger.propagate = False
+        self._logger.setLevel(logging.INFO)
+        self._max_bytes = max_bytes
+        self._backups = backups
+        self._ready = False
+
+    def _open(self):
+        # Created on first write so importing the app never touches the disk
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        handler = RotatingFileHandler(self.path, maxBytes=self._max_bytes, backupCount=self._backups, encoding="utf-8")
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        self._logger.addHandler(handler)
+        self._ready = True
+
+    def write(self, trace):
+        if trace is None:
+            return
+        try:
+            if not self._ready:
+                self._open()
+            self._logger.info(json.dumps(trace, default=str))
+        except Exception as e:
+            print(f"[TRACE] Write failed: {e}")
+
+    def recent(self, limit=50, tenant_id=None):
+        # Newest-first, from the current file only
+        if not os.path.exists(self.path):
+            return []
+        with open(self.path, encoding="utf-8") as f:
+            lines = f.readlines()
+        traces = []
+        for line in reversed(lines):
+            try:
+                trace = json.loads(line)
+            except ValueError:
+                continue
+            if tenant_id is None or trace.get("tenant_id") == tenant_id:
+                traces.append(trace)
+                if len(traces) >= limit:
+                    break
+        return traces
+
+trace_store = TraceStore(TRACE_STORE_PATH, TRACE_STORE_MAX_BYTES, TRACE_STORE_BACKUPS)
@@ -0,0 +1,125 @@
+import asyncio
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+
+from app.config import ADMISSION_MAX_CONCURRENCY, ADMISSION_MAX_QUEUE, ADMISSION_MAX_WAIT_SECONDS
+
+LANES = ("interactive", "batch")  # Served strictly in this order when a slot frees
+
+class AdmissionRejected(Exception):
+    """Tenant queue is full (or the wait timed out); maps to HTTP 429."""
+    def __init__(self, tenant_id, retry_after):
+        super().__init__(f"Too many concurrent queries for tenant '{tenant_id}' - retry in {retry_after}s")
+        self.tenant_id = tenant_id
+        self.retry_after = retry_after
+
+class _Tenant:
+    def __init__(self):
+        self.active = 0
+        self.queues = {lane: deque() for lane in LANES}
+        self.stats = {"admitted": 0, "rejected": 0, "timed_out": 0, "wait_seconds_total": 0.0, "wait_seconds_max": 0.0}
+        self.avg_service_seconds = 1.0  # EWMA of slot hold time, drives Retry-After
+
+    def queued(self):
+        return sum(len(q) for q in self.queues.values())
+
+class AdmissionController:
+    """
+    Per-tenant concurrency limit in front of bi_graph, with a bounded wait
+    queue split into priority lanes: interactive waiters always get a freed
+    slot before batch waiters. Slots are handed directly to the next waiter,
+    so a newcomer can never jump the queue.
+    """
+
+    def __init__(self, max_concurrency, max_queue, max_wait_seconds):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.max_wait_seconds = max_wait_seconds
+        self._tenants = {}
+
+    def _retry_after(self, tenant):
+        backlog = tenant.queued() + 1
+        return max(1, math.ceil(tenant.avg_service_seconds * backlog / self.max_concurrency))
+
+    async def acquire(self, tenant_id, lane="interactive", timeout=None, max_wait=None):
+        # timeout (seconds) can only shorten the max wait, e.g. to the
+        # request's remaining deadline budget. max_wait replaces the
+        # configured one for callers that may wait longer (background jobs).
+        tenant = self._tenants.setdefault(tenant_id, _Tenant())
+        if lane not in tenant.queues:
+            lane = "interactive"
+
+        if tenant.active < self.max_concurrency and tenant.queued() == 0:
+            tenant.active += 1
+            tenant.stats["admitted"] += 1
+            return
+
+        if tenant.queued() >= self.max_queue:
+            tenant.stats["rejected"] += 1
+            raise AdmissionRejected(tenant_id, self._retry_after(tenant))
+
+        waiter = asyncio.get_running_loop().create_future()
+        tenant.queues[lane].append(waiter)
+        start = time.perf_counter()
+        try:
+            max_wait = self.max_wait_seconds if max_wait is None else max_wait
+            max_wait = max_wait if timeout is None else max(0.0, min(timeout, max_wait))
+            await asyncio.wait_for(asyncio.shield(waiter), timeout=max_wait)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if waiter.done() and not waiter.cancelled():
+                # Slot was handed over just as we gave up - pass it on
+                self.release(tenant_id)
+            else:
+                waiter.cancel()
+                tenant.queues[lane].remove(waiter)
+            if isinstance(e, asyncio.TimeoutError):
+                tenant.stats["timed_out"] += 1
+                raise AdmissionRejected(tenant_id, self._retry_after(tenant))
+            raise
+
+        waited = time.perf_counter() - start
+        tenant.stats["admitted"] += 1
+        tenant.stats["wait_seconds_total"] += waited
+        tenant.stats["wait_seconds_max"] = max(tenant.stats["wait_seconds_max"], waited)
+
+    def release(self, tenant_id, held_seconds=None):
+        tenant = self._tenants[tenant_id]
+        if held_seconds is not None:
+            tenant.avg_service_seconds = 0.8 * tenant.avg_service_seconds + 0.2 * held_seconds
+        for lane in LANES:
+            queue = tenant.queues[lane]
+            while queue:
+                waiter = queue.popleft()
+                if not waiter.done():
+                    waiter.set_result(True)  # Slot ownership moves to the waiter
+                    return
+        tenant.active -= 1
+
+    @asynccontextmanager
+    async def slot(self, tenant_id, lane="interactive", timeout=None, max_wait=None):
+        await self.acquire(tenant_id, lane, timeout, max_wait)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.release(tenant_id, time.perf_counter() - start)
+
+    def snapshot(self):
+        tenants = {}
+        for tenant_id, tenant in self._tenants.items():
+            admitted = tenant.stats["admitted"]
+            tenants[tenant_id] = {
+                "active": tenant.active,
+                "queue_depth": {lane: len(q) for lane, q in tenant.queues.items()},
+                **tenant.stats,
+                "wait_seconds_avg": round(tenant.stats["wait_seconds_total"] / admitted, 4) if admitted else 0.0,
+            }
+        return {
+            "max_concurrency_per_tenant": self.max_concurrency,
+            "max_queue_per_tenant": self.max_queue,
+            "tenants": tenants,
+        }
+
+admission = AdmissionController(ADMISSION_MAX_CONCURRENCY, ADMISSION_MAX_QUEUE, ADMISSION_MAX_WAIT_SECONDS)
@@ -0,0 +1,146 @@
+import asyncio
+import time
+import uuid
+from collections import deque
+
+from app.langgraph.deadline import DeadlineExceeded
+from app.config import JOB_WORKERS, JOB_MAX_QUEUED, JOB_RETENTION_SECONDS, JOB_MAX_PER_TENANT
+
+class JobQueueFull(Exception):
+    """Too many jobs waiting for a worker; maps to HTTP 429."""
+
+class JobManager:
+    """
+    Background execution for long-running questions: POST /jobs enqueues and
+    returns immediately, a fixed pool of worker tasks drains the queue, and
+    clients poll status / fetch the stored result. Finished jobs are kept for
+    JOB_RETENTION_SECONDS.
+
+    At most max_per_tenant jobs of one tenant run at a time; further jobs of
+    that tenant wait (still "queued") without holding a worker.
+    """
+
+    def __init__(self, workers, max_queued, retention_seconds, max_per_tenant):
+        self.workers = workers
+        self.max_queued = max_queued
+        self.retention_seconds = retention_seconds
+        self.max_per_tenant = max_per_tenant
+        self._jobs = {}  # job_id -> job record (public fields)
+        self._payloads = {}  # job_id -> payload waiting for a worker
+        self._results = {}  # job_id -> response dict
+        self._running = {}  # tenant_id -> jobs holding a worker
+        self._deferred = {}  # tenant_id -> job ids waiting for the tenant's running jobs
+        self._queue = None
+        self._tasks = []
+        self._runner = None
+
+    def start(self, runner):
+        # runner: async (payload, on_start, on_node) -> response. on_start()
+        # marks the job running (once admitted), on_node(name) reports progress
+        self._runner = runner
+        self._queue = asyncio.Queue()
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self.workers)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def submit(self, payload):
+        self._purge()
+        if self._queue is None:
+            raise RuntimeError("Job workers are not running")
+        if self._waiting() >= self.max_queued:
+            raise JobQueueFull(f"Job queue is full ({self.max_queued} waiting) - retry later")
+        job_id = uuid.uuid4().hex
+        self._jobs[job_id] = {
+            "job_id": job_id,
+            "tenant_id": payload["tenant_id"],
+            "question": payload["question"],
+            "status": "queued",
+            "created_at": time.time(),
+            "started_at": None,
+            "finished_at": None,
+            "progress": [],
+        }
+        self._payloads[job_id] = payload
+        self._queue.put_nowait(job_id)
+        return self._jobs[job_id]
+
+    def get(self, job_id, tenant_id):
+        job = self._jobs.get(job_id)
+        if job is None or job["tenant_id"] != tenant_id:
+            return None
+        return job
+
+    def result(self, job_id):
+        return self._results.get(job_id)
+
+    def snapshot(self):
+        # Queue depth plus retained jobs by status (see /metrics)
+        by_status = {}
+        for job in self._jobs.values():
+            by_status[job["status"]] = by_status.get(job["status"], 0) + 1
+        return {
+            "workers": self.workers,
+            "max_queued": self.max_queued,
+            "max_per_tenant": self.max_per_tenant,
+            "queued": self._waiting(),
+            "jobs": by_status,
+        }
+
+    def _waiting(self):
+        deferred = sum(len(ids) for ids in self._deferred.values())
+        return (self._queue.qsize() if self._queue is not None else 0) + deferred
+
+    async def _worker(self, worker_id):
+        while True:
+            job_id = await self._queue.get()
+            job = self._jobs.get(job_id)
+            if job is None or job_id not in self._payloads:
+                continue
+            tenant_id = job["tenant_id"]
+            if self._running.get(tenant_id, 0) >= self.max_per_tenant:
+                # Parked until one of the tenant's running jobs finishes
+                self._deferred.setdefault(tenant_id, deque()).append(job_id)
+                continue
+            self._running[tenant_id] = self._running.get(tenant_id, 0) + 1
+            try:
+                await self._run(job_id, job, self._payloads.pop(job_id))
+            finally:
+                self._running[tenant_id] -= 1
+                deferred = self._deferred.get(tenant_id)
+                if deferred:
+                    self._queue.put_nowait(deferred.popleft())
+                    if not deferred:
+                        del self._deferred[tenant_id]
+
+    async def _run(self, job_id, job, payload):
+        def on_start():
+            job["status"] = "running"
+            job["started_at"] = time.time()
+
+        def on_node(node):
+            job["progress"].append({"node": node, "elapsed_ms": round((time.time() - job["started_at"]) * 1000, 1)})
+
+        try:
+            self._results[job_id] = await self._runner(payload, on_start, on_node)
+            job["status"] = "succeeded"
+        except DeadlineExceeded as e:
+            job["status"] = "timeout"
+            job["stage"] = e.stage
+            job["error"] = str(e)
+        except Exception as e:
+            print(f"[JOBS] Job {job_id} failed: {e}")
+            job["status"] = "failed"
+            job["error"] = str(e)
+        job["finished_at"] = time.time()
+
+    def _purge(self):
+        cutoff = time.time() - self.retention_seconds
+        for job_id in [k for k, job in self._jobs.items() if job["finished_at"] and job["finished_at"] < cutoff]:
+            self._jobs.pop(job_id, None)
+            self._results.pop(job_id, None)
+
+job_manager = JobManager(JOB_WORKERS, JOB_MAX_QUEUED, JOB_RETENTION_SECONDS, JOB_MAX_PER_TENANT)
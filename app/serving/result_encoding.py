@@ -0,0 +1,67 @@
+import importlib.util
+import json
+from fastapi.responses import Response
+
+# Optional dependency: Arrow IPC is only offered when pyarrow is installed.
+# Only probe for it here - the import itself waits for the first Arrow request.
+HAS_PYARROW = importlib.util.find_spec("pyarrow") is not None
+
+ROWS_MEDIA_TYPE = "application/json"
+COLUMNAR_MEDIA_TYPE = "application/vnd.agentic-bi.columnar+json"
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+ARROW_METADATA_KEY = b"agentic_bi_response"
+
+def negotiate(accept_header):
+    # Pick "arrow", "columnar" or "rows" from an Accept header (q-values honoured)
+    best, best_q = "rows", 0.0
+    for part in (accept_header or "").split(","):
+        media_type, *params = [p.strip() for p in part.split(";")]
+        q = 1.0
+        for param in params:
+            if param.startswith("q="):
+                try:
+                    q = float(param[2:])
+                except ValueError:
+                    q = 0.0
+        if media_type == ARROW_MEDIA_TYPE and HAS_PYARROW:
+            fmt = "arrow"
+        elif media_type == COLUMNAR_MEDIA_TYPE:
+            fmt = "columnar"
+        else:
+            continue
+        if q > best_q:
+            best, best_q = fmt, q
+    return best
+
+def to_columnar(rows):
+    # List of row dicts -> column names once + one value list per column
+    columns = list(rows[0].keys()) if rows else []
+    return {"columns": columns, "values": [[row[c] for row in rows] for c in columns]}
+
+def _json_response(content, media_type):
+    # default=str keeps dates/Decimals from non-SQLite backends serializable
+    return Response(json.dumps(content, default=str), media_type=media_type)
+
+def _arrow_response(response, pa):
+    # Rows become one Arrow record batch; everything else (kpis, sql, reasoning,
+    # cursor...) rides along as JSON in the schema metadata
+    meta = {k: v for k, v in response.items() if k != "data"}
+    table = pa.Table.from_pylist(response["data"])
+    table = table.replace_schema_metadata({ARROW_METADATA_KEY: json.dumps(meta, default=str).encode()})
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return Response(sink.getvalue().to_pybytes(), media_type=ARROW_MEDIA_TYPE)
+
+def encode_response(response, fmt):
+    # Error payloads and the default row layout go out as plain JSON
+    if fmt == "rows" or "data" not in response:
+        return response
+    if fmt == "arrow":
+        import pyarrow as pa
+        try:
+            return _arrow_response(response, pa)
+        except (pa.ArrowInvalid, pa.ArrowTypeError) as e:
+            # Mixed-type columns Arrow cannot infer; columnar JSON still works
+            print(f"[ENCODING] Arrow encoding failed, falling back to columnar JSON: {e}")
+    return _json_response({**response, "data": to_columnar(response["data"]), "format": "columnar"}, COLUMNAR_MEDIA_TYPE)
@@ -0,0 +1,123 @@
+import asyncio
+import time
+
+from app.agents.vault import current_vault
+from app.config import (
+    WARMUP_DB_CONNECTIONS, WARMUP_TENANTS, WARMUP_VAULT,
+    WARMUP_MAX_ATTEMPTS, WARMUP_RETRY_BASE_SECONDS, WARMUP_RETRY_MAX_SECONDS,
+)
+
+class WarmupState:
+    """
+    Tracks the startup warm-up phase behind /ready. The replica reports ready
+    only after every step finished: deferred node dependencies imported, DB
+    pool opened, memory embedder loaded, vault questions embedded and vault
+    answers cached.
+    """
+
+    def __init__(self):
+        self.ready = False
+        self.started_at = None
+        self.finished_at = None
+        self.steps = {}  # step -> {"status": ..., "seconds": ..., ...}
+
+    def snapshot(self):
+        return {
+            "ready": self.ready,
+            "warmup_seconds": round((self.finished_at or time.time()) - self.started_at, 3) if self.started_at else 0.0,
+            "steps": self.steps,
+        }
+
+warmup_state = WarmupState()
+
+def _load_node_dependencies():
+    # Graph is compiled at import; this pulls in what its nodes import lazily
+    import langchain_groq  # noqa: F401  (metadata/sql agents)
+    from app.langgraph.graph import bi_graph
+    bi_graph.get_graph()
+    return {}
+
+def _open_db_pool():
+    # Check out N connections at once so the pool keeps them open afterwards
+    from sqlalchemy import text
+    from app.agents.execute_agent import get_engine
+    engine = get_engine()
+    conns = [engine.connect() for _ in range(WARMUP_DB_CONNECTIONS)]
+    try:
+        for conn in conns:
+            conn.execute(text("SELECT 1"))
+    finally:
+        for conn in conns:
+            conn.close()
+    return {"connections": len(conns)}
+
+def _load_embedder():
+    from app.memory.mem0_client import get_memory
+    return {"provider": type(get_memory()).__name__}
+
+def _build_vault_index():
+    from app.agents.vault import semantic_index
+    index = semantic_index()
+    if index is None:
+        return {"semantic": "disabled"}
+    return {"semantic": index.embedder.name, "questions": len(index.keys)}
+
+async def _warm_vault(answer):
+    # Run every certified question once per tenant to fill the response cache
+    failed = 0
+    questions = list(current_vault())
+    for tenant_id in WARMUP_TENANTS:
+        for question in questions:
+            try:
+                await answer({"tenant_id": tenant_id, "user_id": "warmup", "question": question, "history": [], "warmup": True})
+            except Exception as e:
+                failed += 1
+                print(f"[WARMUP] Vault question failed for {tenant_id}: {question[:60]} ({e})")
+    return {"questions": len(questions) * len(WARMUP_TENANTS), "failed": failed}
+
+async def _step(name, fn):
+    # A failed step is retried with exponential backoff, so a dependency that
+    # is briefly down at boot (e.g. the database) delays readiness instead of
+    # keeping /ready at 503 until the process restarts
+    start = time.perf_counter()
+    attempt, delay = 0, WARMUP_RETRY_BASE_SECONDS
+    while True:
+        attempt += 1
+        try:
+            detail = await fn()
+            warmup_state.steps[name] = {"status": "ok", "attempts": attempt, **detail}
+            return True
+        except Exception as e:
+            if WARMUP_MAX_ATTEMPTS and attempt >= WARMUP_MAX_ATTEMPTS:
+                print(f"[WARMUP] Step '{name}' failed after {attempt} attempts: {e}")
+                warmup_state.steps[name] = {"status": "failed", "attempts": attempt, "error": str(e)}
+                return False
+            print(f"[WARMUP] Step '{name}' failed (attempt {attempt}), retrying in {delay:g}s: {e}")
+            warmup_state.steps[name] = {"status": "retrying", "attempts": attempt, "error": str(e), "retry_in_seconds": delay}
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, WARMUP_RETRY_MAX_SECONDS)
+        finally:
+            warmup_state.steps[name]["seconds"] = round(time.perf_counter() - start, 3)
+
+async def run_warmup(answer):
+    # answer: coroutine function taking an /ask payload (main._answer with a deadline)
+    warmup_state.started_at = time.time()
+    for name in ("graph", "database", "embedder", "vault_index", "vault"):
+        warmup_state.steps[name] = {"status": "pending"}
+
+    ok = await _step("graph", lambda: asyncio.to_thread(_load_node_dependencies))
+    ok = await _step("database", lambda: asyncio.to_thread(_open_db_pool)) and ok
+    ok = await _step("embedder", lambda: asyncio.to_thread(_load_embedder)) and ok
+    ok = await _step("vault_index", lambda: asyncio.to_thread(_build_vault_index)) and ok
+    if WARMUP_VAULT and ok:
+        ok = await _step("vault", lambda: _warm_vault(answer)) and ok
+    else:
+        warmup_state.steps["vault"] = {"status": "skipped"}
+
+    warmup_state.finished_at = time.time()
+    warmup_state.ready = ok
+    print(f"[WARMUP] Finished in {warmup_state.finished_at - warmup_state.started_at:.2f}s - ready={ok}")
+
+def mark_ready_without_warmup():
+    warmup_state.ready = True
+    warmup_state.steps = {"warmup": {"status": "disabled"}}
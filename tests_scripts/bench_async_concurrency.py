@@ -0,0 +1,94 @@
+"""
+Concurrency benchmark: sync /ask (threadpool) vs async /ask (bi_graph.ainvoke).
+
+The Groq LLM is replaced by a local stand-in that just sleeps, so the numbers
+show how request concurrency scales when the pipeline is I/O bound.
+Runs fully offline against a throwaway SQLite database.
+
+Usage: python tests_scripts/bench_async_concurrency.py [llm_delay_seconds]
+"""
+import asyncio
+import contextlib
+import io
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Throwaway DB must be configured before the agents create their engine
+_db_path = os.path.join(tempfile.mkdtemp(), "bench.sqlite")
+_conn = sqlite3.connect(_db_path)
+_conn.execute("CREATE TABLE sales (region TEXT, revenue REAL)")
+_conn.executemany("INSERT INTO sales VALUES (?, ?)", [("North", 100.0), ("South", 250.0), ("East", 75.5)])
+_conn.commit()
+_conn.close()
+os.environ["DATABASE_URL"] = f"sqlite:///{_db_path}"
+# Measure the pipeline, not the caches: both modes run the same questions, so
+# the sync pass would otherwise pre-fill answers for the async one
+os.environ["RESPONSE_CACHE_ENABLED"] = "false"
+os.environ["NODE_MEMO_ENABLED"] = "false"
+os.environ["LEARNED_VAULT_ENABLED"] = "false"
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from app.agents import metadata_agent, sql_agent
+from app.langgraph.graph import bi_graph
+
+LLM_DELAY = float(sys.argv[1]) if len(sys.argv) > 1 else 0.5
+STARLETTE_THREADS = 40  # anyio default thread limiter used for sync endpoints
+
+
+class _Msg:
+    def __init__(self, content):
+        self.content = content
+
+
+class DelayedLLM:
+    """Stand-in for ChatGroq: fixed latency, canned answer."""
+    def __init__(self, answer):
+        self.answer = answer
+
+    def invoke(self, prompt):
+        time.sleep(LLM_DELAY)
+        return _Msg(self.answer)
+
+    async def ainvoke(self, prompt):
+        await asyncio.sleep(LLM_DELAY)
+        return _Msg(self.answer)
+
+
+metadata_agent.get_llm = lambda timeout=None: DelayedLLM('{"corrected_question": "regional revenue", "tables": ["sales"]}')
+sql_agent.get_llm = lambda timeout=None: DelayedLLM("SELECT region, SUM(revenue) as revenue FROM sales GROUP BY region")
+
+
+def _payload(i):
+    return {"tenant_id": "bench", "user_id": f"u{i}", "question": f"regional revenue breakdown #{i}", "history": []}
+
+
+def run_sync(n):
+    with ThreadPoolExecutor(max_workers=STARLETTE_THREADS) as pool:
+        start = time.perf_counter()
+        list(pool.map(lambda i: bi_graph.invoke(_payload(i)), range(n)))
+        return time.perf_counter() - start
+
+
+async def _run_async(n):
+    start = time.perf_counter()
+    await asyncio.gather(*(bi_graph.ainvoke(_payload(i)) for i in range(n)))
+    return time.perf_counter() - start
+
+
+def run_async(n):
+    return asyncio.run(_run_async(n))
+
+
+if __name__ == "__main__":
+    print(f"LLM stand-in delay: {LLM_DELAY:.2f}s per call (2 calls per question)")
+    print(f"{'concurrent':>10} | {'sync wall (s)':>13} | {'sync q/s':>8} | {'async wall (s)':>14} | {'async q/s':>9}")
+    print("-" * 68)
+    for n in (10, 40, 80, 160):
+        with contextlib.redirect_stdout(io.StringIO()):  # agents print per request
+            t_sync = run_sync(n)
+            t_async = run_async(n)
+        print(f"{n:>10} | {t_sync:>13.2f} | {n / t_sync:>8.1f} | {t_async:>14.2f} | {n / t_async:>9.1f}")
@@ -0,0 +1,51 @@
+"""
+Cold-start benchmark for the API: how long `import app.main` takes and which
+modules it pays for. Runs the import in a fresh interpreter with
+`python -X importtime` and reports cumulative import time per module.
+
+Usage: python tests_scripts/bench_startup_imports.py [module]   (default: app.main)
+"""
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+TARGET = sys.argv[1] if len(sys.argv) > 1 else "app.main"
+
+# Heavy third-party packages worth watching, plus every app.* module
+WATCH = (
+    "fastapi", "langgraph", "langgraph.graph", "langchain_core", "langchain_core.runnables", "langchain_groq", "groq", "mem0", "qdrant_client",
+    "sentence_transformers", "torch", "pandas", "numpy", "pyarrow", "sqlalchemy",
+)
+
+def main():
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {TARGET}"],
+        cwd=ROOT, capture_output=True, text=True,
+    )
+    wall = time.perf_counter() - start
+    if proc.returncode != 0:
+        print(proc.stderr[-2000:])
+        sys.exit(proc.returncode)
+
+    # Lines look like: "import time:   self [us] | cumulative | imported package"
+    cumulative = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cum, name = [p.strip() for p in line[len("import time:"):].split("|")]
+        cumulative[name] = max(cumulative.get(name, 0), int(cum))
+
+    print(f"Cold import of {TARGET}: {cumulative.get(TARGET, 0) / 1e6:.3f}s (process wall {wall:.3f}s)\n")
+    print(f"{'module':<40} {'cumulative (ms)':>15}")
+    print("-" * 56)
+    rows = [(n, us) for n, us in cumulative.items() if n in WATCH or n.startswith("app.")]
+    for name, us in sorted(rows, key=lambda r: -r[1]):
+        print(f"{name:<40} {us / 1000:>15.1f}")
+    missing = [m for m in WATCH if m not in cumulative]
+    print(f"\nNot imported at startup: {', '.join(missing)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Vault matcher benchmark: the indexed matcher (normalized-hash exact index +
+trigram candidate filter) against the previous linear scan + difflib over
+all keys, on a synthetic vault of certified questions.
+
+Usage: python tests_scripts/bench_vault_matcher.py [entries]   (default: 100000)
+"""
+import difflib
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from app.agents.vault import current_vault, VaultIndex, normalize_question
+
+ENTRIES = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+QUERIES = 200
+LEGACY_QUERIES = 5  # The linear matcher takes seconds per miss at this size
+
+METRICS = ["total revenue", "average discount", "units sold", "support tickets", "churned customers", "marketing spend", "website sessions", "inventory on hand"]
+DIMENSIONS = ["region", "product", "channel", "department", "customer tier", "warehouse", "campaign", "device type"]
+PERIODS = [f"{m} {y}" for y in (2023, 2024, 2025, 2026) for m in ("January", "February", "March", "April", "May", "June", "July", "August", "September", "October", "November", "December")]
+VERBS = ["Show", "Compare", "List", "Break down", "Summarize"]
+
+def synthetic_vault(n):
+    rng = random.Random(7)
+    vault = dict(current_vault())
+    while len(vault) < n:
+        q = f"{rng.choice(VERBS)} {rng.choice(METRICS)} by {rng.choice(DIMENSIONS)} for {rng.choice(PERIODS)} (set {rng.randint(1, 10**6)})."
+        vault[q] = {"sql": "SELECT 1", "tables": ["sales"]}
+    return vault
+
+def typo(text, rng):
+    # One dropped character - the kind of slip the fuzzy tier exists for
+    i = rng.randrange(len(text) - 1)
+    return text[:i] + text[i + 1:]
+
+def legacy_match(vault, question):
+    # The previous implementation: normalize every key per call, then difflib over all keys
+    q = normalize_question(question)
+    for k, v in vault.items():
+        if normalize_question(k) == q:
+            return v, "hit"
+    matches = difflib.get_close_matches(question, list(vault.keys()), n=1, cutoff=0.90)
+    return (vault[matches[0]], "fuzzy_hit") if matches else (None, "miss")
+
+def timed(fn, queries):
+    start = time.perf_counter()
+    results = [fn(q) for q in queries]
+    return (time.perf_counter() - start) / len(queries) * 1000, results
+
+def main():
+    rng = random.Random(11)
+    vault = synthetic_vault(ENTRIES)
+    start = time.perf_counter()
+    index = VaultIndex(vault)
+    print(f"Vault entries: {len(index):,}   index build: {time.perf_counter() - start:.2f}s")
+
+    keys = list(vault.keys())
+    workloads = {
+        "exact": [rng.choice(keys).upper() for _ in range(QUERIES)],
+        "fuzzy": [typo(rng.choice(keys), rng) for _ in range(QUERIES)],
+        "miss": [f"How many unicorns visited warehouse {i} last decade?" for i in range(QUERIES)],
+    }
+
+    print(f"\n{'workload':<8} {'indexed ms/q':>13} {'legacy ms/q':>12} {'agree':>7}")
+    for name, queries in workloads.items():
+        indexed_ms, indexed = timed(lambda q: index.match(q)[:2], queries)
+        legacy_ms, legacy = timed(lambda q: legacy_match(vault, q), queries[:LEGACY_QUERIES])
+        agree = sum(a[1] == b[1] and a[0] is b[0] for a, b in zip(indexed, legacy))
+        found = sum(r[1] != "miss" for r in indexed)
+        print(f"{name:<8} {indexed_ms:>13.3f} {legacy_ms:>12.1f} {agree:>4}/{len(legacy)}   (indexed found {found}/{len(queries)})")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+import requests
+import sys
+import os
+
+# Send every certified vault question in ONE request to /ask/batch
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from app.agents.vault import current_vault
+
+url = "http://localhost:8000/ask/batch"
+payload = {
+    "tenant_id": "test_tenant",
+    "user_id": "test_user",
+    "questions": list(current_vault().keys()),
+}
+
+print("=" * 80)
+print(f"TESTING BATCH ENDPOINT ({len(payload['questions'])} questions)")
+print("=" * 80)
+
+try:
+    response = requests.post(url, json=payload, timeout=120)
+    data = response.json()
+    if "error" in data:
+        print(f"❌ ERROR: {data['error']}")
+        sys.exit(1)
+
+    for item in data["results"]:
+        if item["status"] == "ok":
+            records = len(item["response"].get("data", []))
+            print(f"✅ [{item['index']:>2}] {item['elapsed_ms']:>8.1f} ms | {records:>5} records | {item['question'][:60]}")
+        else:
+            print(f"❌ [{item['index']:>2}] {item['error']} | {item['question'][:60]}")
+
+    print(f"\nExecuted {data['executed']} / {data['total']} (deduplicated: {data['deduplicated']})")
+except Exception as e:
+    print(f"❌ EXCEPTION: {str(e)}")
@@ -0,0 +1,46 @@
+import os
+import sys
+
+# Learned vault tier: promotion after repeated successful runs, and demotion
+# as soon as a learned SQL fails to execute. Runs in-process, no server needed.
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+os.environ["LEARNED_VAULT_DB_PATH"] = ""
+os.environ["LEARNED_VAULT_PROMOTE_AFTER"] = "3"
+
+from app.agents import sql_agent
+from app.agents.learned_vault import learned_vault
+
+SCHEMA = "1"
+question = "List every region with its target revenue"
+state = {
+    "tenant_id": "test_tenant",
+    "question": question,
+    "history": [],
+    "sql": "SELECT name, target_revenue FROM regions",
+    "sql_source": "llm",
+    "metadata": {"tables": ["regions"]},
+}
+
+failures = 0
+
+def expect(label, ok):
+    global failures
+    print(f"{'✅' if ok else '❌'} {label}")
+    failures += 0 if ok else 1
+
+for _ in range(3):
+    sql_agent.learn(state, True, SCHEMA)
+entry = learned_vault.lookup("test_tenant", question, SCHEMA)
+expect("promoted after 3 successful runs", entry is not None and entry["sql"] == state["sql"])
+
+# The next request is served from the learned tier and its SQL now fails
+learned_run = {**state, "sql_source": "learned"}
+sql_agent.learn(learned_run, False, SCHEMA)
+expect("demoted after a failed learned run", learned_vault.lookup("test_tenant", question, SCHEMA) is None)
+expect("demotion counted", learned_vault.snapshot()["demotions"] == 1)
+
+# Certified vault SQL never enters the learned tier
+sql_agent.learn({**state, "question": "another question", "sql_source": "vault"}, True, SCHEMA)
+expect("vault SQL not recorded", learned_vault.snapshot()["candidates"] == 0)
+
+sys.exit(1 if failures else 0)
@@ -0,0 +1,57 @@
+import os
+import sys
+
+# Semantic vault tier with the opt-in hashing embedder: paraphrases and
+# abbreviations reach the certified SQL; a different year, direction,
+# dimension or filter value never does.
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+os.environ["VAULT_EMBEDDER"] = "hashing"
+
+from app.agents.vault import current_vault, match_vault, semantic_index
+from app.agents.vault_semantic import HashingEmbedder, SemanticVaultIndex
+from app.config import VAULT_HASHING_DIM
+
+BUDGET = "Compare allocated budget vs actual spend by department for all quarters of 2025."
+CASES = [
+    # (question, expected match type, expected certified question or None)
+    ("budget vs actual by dept in 2025", "semantic_hit", BUDGET),
+    ("budget vs actual by department in 2025", "semantic_hit", BUDGET),
+    ("budget vs actual by dept in 2031", "miss", None),
+    ("products where quantity on hand is above the reorder point", "miss", None),
+]
+
+# Close in embedding space, different in meaning. Checked against an index
+# with no score threshold, so only the contrast check can keep them apart.
+WRONG = [
+    ("products where quantity on hand is above the reorder point", "List all products where the current quantity on hand is below the reorder point."),
+    ("satisfaction score for billing tickets", "Calculate the average customer satisfaction score for bug-related tickets."),
+    ("budget vs actual by region for 2025", BUDGET),
+    ("highest cost-per-conversion", "Which marketing channel (FB, GAds, LI) has the lowest cost-per-conversion?"),
+    ("lowest lifetime spend", "Which loyalty tier (Gold/Silver/Bronze) has the highest total lifetime spend?"),
+]
+
+semantic_index()  # Built by the warm-up in the server; lookups never wait for it
+
+failures = 0
+for question, expected_type, expected_key in CASES:
+    entry, match_type = match_vault(question)
+    ok = match_type == expected_type and (expected_key is None or entry == current_vault()[expected_key])
+    print(f"{'✅' if ok else '❌'} {question!r} -> {match_type}")
+    failures += 0 if ok else 1
+
+index = SemanticVaultIndex(list(current_vault()), HashingEmbedder(VAULT_HASHING_DIM), threshold=0.0)
+for question, wrong_key in WRONG:
+    idx, score = index.match(question)
+    ok = idx is None or index.keys[idx] != wrong_key
+    print(f"{'✅' if ok else '❌'} {question!r} -> not {wrong_key[:50]!r}")
+    failures += 0 if ok else 1
+
+# Without the model, "auto" leaves the semantic tier off
+from app.agents import vault_semantic
+vault_semantic.VAULT_EMBEDDER = "auto"
+vault_semantic.HAS_SENTENCE_TRANSFORMERS = False
+ok = vault_semantic.load_embedder() is None
+print(f"{'✅' if ok else '❌'} auto without sentence-transformers -> semantic matching off")
+failures += 0 if ok else 1
+
+sys.exit(1 if failures else 0)
@@ -4,6 +4,12 @@ import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime
+import uuid
+try:
+    from ui.render_utils import decode_ask_response, RESULT_ACCEPT_HEADER
+except ImportError:
+    # Fallback if running from the ui/ folder
+    from render_utils import decode_ask_response, RESULT_ACCEPT_HEADER
 
 # --- PAGE CONFIG ---
 st.set_page_config(
@@ -44,7 +50,8 @@ with st.sidebar:
     st.code("LangGraph\nFastAPI\nMem0\nStreamlit\nSQLite")
     st.divider()
     if st.button("🗑️ Clear Chat History"):
-        st.session_state.history = []
+        # A new server-side session starts a fresh conversation
+        st.session_state.session_id = uuid.uuid4().hex
 
 # --- MAIN UI ---
 st.markdown("<div class='main-header'>Strategic Insights Engine</div>", unsafe_allow_html=True)
@@ -62,15 +69,13 @@ if st.button("🚀 Analyze Insights"):
                     "tenant_id": "t1",
                     "user_id": "u1",
                     "question": q,
-                    "history": st.session_state.get("history", [])
-                })
+                    # Conversation context lives server-side; only the question is sent
+                    "session_id": st.session_state.setdefault("session_id", uuid.uuid4().hex)
+                }, headers={"Accept": RESULT_ACCEPT_HEADER})
                 
                 if response.status_code == 200:
-                    r = response.json()
-                    
-                    # Store history if backend supports it
-                    if "history" not in st.session_state:
-                        st.session_state.history = []
+                    # Arrow / columnar payloads decode straight into a DataFrame
+                    r = decode_ask_response(response)
                     
                     # --- KPI ROW ---
                     st.divider()
@@ -5,11 +5,12 @@ import plotly.express as px
 from datetime import datetime, timedelta, timezone
 import random
 import os
+import uuid
 try:
-    from ui.render_utils import render_data_results
+    from ui.render_utils import render_data_results, iter_sse_events
 except ImportError:
     # Fallback if running from root
-    from render_utils import render_data_results
+    from render_utils import render_data_results, iter_sse_events
 
 try:
     from seed_db import seed as seed_data
@@ -220,6 +221,9 @@ with tab1:
     # Initialize Chat History (Must be at the top)
     if "chat_history" not in st.session_state:
         st.session_state.chat_history = []
+    # Server-side conversation session: the backend keeps the compact history
+    if "session_id" not in st.session_state:
+        st.session_state.session_id = uuid.uuid4().hex
 
     # 1. Header Section
     # 1. Header Section
@@ -402,6 +406,11 @@ with tab1:
                              new_cust_id, new_disc, new_qty, new_price, new_tax))
                         conn.commit()
                         conn.close()
+                        # Drop cached answers that read the sales table (best effort)
+                        try:
+                            requests.post("http://localhost:8000/cache/invalidate", json={"tables": ["sales"]}, timeout=2)
+                        except requests.exceptions.RequestException:
+                            pass
                         st.success("✅ Enterprise Record Successfully Injected!")
                         log_event("Manual Entry", f"Injected: ${new_rev} | {new_region} | {new_prod} | Cust:{new_cust_id}")
                     except Exception as e:
@@ -621,25 +630,59 @@ with tab1:
         try:
             # 3. Robust Backend Call
             try:
-                # Pass history for context
-                history_context = []
-                for turn in st.session_state.chat_history[-5:]:
-                    history_context.append(f"User: {turn['user']}")
-                    history_context.append(f"AI: {turn['ai']}")
-                    
-                response = requests.post("http://localhost:8000/ask", json={
-                    "tenant_id": "t1", "user_id": "u1", "question": q, "history": history_context
-                }, timeout=10)
-            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                # Stream per-agent progress (SSE) instead of blocking on the full pipeline
+                with st.status("🤖 Agents are collaborating...", expanded=False) as progress:
+                    with requests.post("http://localhost:8000/ask/stream", json={
+                        "tenant_id": "t1", "user_id": "u1", "question": q, "session_id": st.session_state.session_id
+                    }, stream=True, timeout=10) as stream:
+                        streamed, rows, trace = {}, [], None
+                        if stream.status_code == 429:
+                            # Tenant is over its admission limit - report it rather than running locally
+                            streamed = {"error": f"Server busy, please retry in {stream.headers.get('Retry-After', 'a few')} seconds."}
+                        else:
+                            stream.raise_for_status()
+                            for event, payload in iter_sse_events(stream):
+                                if event == "node":
+                                    progress.write(f"✅ **{payload['node'].title()} Agent** finished at {payload['elapsed_ms']:,.0f} ms")
+                                    log_event("Agent Progress", f"{payload['node']} node completed")
+                                elif event == "sql":
+                                    progress.code(payload["sql"], language="sql")
+                                    log_event("SQL Generated", payload["sql"][:100])
+                                elif event == "rows":
+                                    rows.extend(payload["rows"])
+                                    progress.update(label=f"📥 Receiving results... {len(rows):,} rows")
+                                elif event == "result":
+                                    streamed = payload
+                                elif event == "trace":
+                                    trace = payload
+                                elif event == "error":
+                                    streamed = payload
+                                    break
+                            if "error" not in streamed:
+                                streamed["data"] = rows
+                                streamed["trace"] = trace
+                    if "error" in streamed:
+                        progress.update(label="⚠️ Analysis failed", state="error")
+                    else:
+                        progress.update(label="✅ Analysis complete", state="complete")
+                response = MockResponse(streamed)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout, requests.exceptions.HTTPError):
                 # Fallback to Direct Agent Execution (Streamlit Cloud mode)
                 log_event("Backend Unavailable", "Running agents locally in Streamlit")
                 
                 try:
+                    # No server session here, so pass a compact history for context
+                    history_context = []
+                    for turn in st.session_state.chat_history[-5:]:
+                        history_context.append(f"User: {turn['user']}")
+                        history_context.append(f"AI: {turn['ai'][:300]}")
+
                     # Import the LangGraph orchestration directly
                     import sys
                     sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
                     from app.langgraph.graph import bi_graph
                     from app.billing.metering import record_usage
+                    from app.observability.tracing import build_trace
                     
                     # Run agents directly using the compiled graph
                     result = bi_graph.invoke({
@@ -652,8 +695,8 @@ with tab1:
                     # Record usage
                     record_usage("t1", "query", 1)
                     
-                    # Extract response
-                    response = MockResponse(result.get("response", result))
+                    # Extract response (plus the per-node trace for the Logs tab)
+                    response = MockResponse({**result.get("response", result), "trace": build_trace(result)})
                     log_event("Query Success", "Direct Agent Execution Completed Successfully")
                     log_event("Local Agents Success", f"Processed query: {q[:50]}...")
                     
@@ -695,6 +738,8 @@ with tab1:
                 })
                 
                 st.session_state.query_result = data
+                if data.get("trace"):
+                    st.session_state.setdefault("query_traces", []).insert(0, data["trace"])
                 st.session_state.show_result = True
                 st.session_state.main_query_input = "" # Clear input safely
                 
@@ -726,6 +771,7 @@ with tab1:
     def clear_all():
         st.session_state.input_query = ""
         st.session_state.chat_history = []
+        st.session_state.session_id = uuid.uuid4().hex
         st.session_state.query_result = None
         st.session_state.show_result = False
 
@@ -1832,6 +1878,35 @@ with tab6:
         if st.sidebar.button("🚨 Simulate System Error", help="Add a manual error log for testing"):
             log_event("Security", "MANUAL ALERT: Simulated system error triggered by admin.")
 
+    # 3.1 Per-query latency waterfall (node spans from the backend trace)
+    st.markdown("### ⏱️ Query Latency Waterfall")
+    query_traces = st.session_state.get("query_traces", [])
+    if not query_traces:
+        st.info("Run a query in the Live Demo tab to see where its time went, agent by agent.")
+    else:
+        trace_idx = st.selectbox(
+            "Query:",
+            range(len(query_traces)),
+            format_func=lambda i: f"{query_traces[i].get('question', '')[:80]} ({query_traces[i].get('total_ms', 0):,.0f} ms)",
+            key="trace_select",
+        )
+        selected_trace = query_traces[trace_idx]
+        df_spans = pd.DataFrame(selected_trace["spans"])
+        df_spans["node"] = df_spans["node"].str.title()
+        detail_cols = [c for c in ["cache_hit", "vault", "memories", "rows", "llm_calls", "total_tokens", "error"] if c in df_spans.columns]
+        fig_trace = px.bar(
+            df_spans, x="duration_ms", y="node", base="offset_ms", orientation="h",
+            color="node", hover_data=detail_cols,
+            labels={"duration_ms": "Duration (ms)", "node": "Agent"},
+            template="plotly_dark",
+        )
+        fig_trace.update_yaxes(autorange="reversed")
+        fig_trace.update_layout(showlegend=False, height=320, xaxis_title="Time since request start (ms)")
+        st.plotly_chart(fig_trace, use_container_width=True)
+        st.dataframe(df_spans[["node", "offset_ms", "duration_ms"] + detail_cols], use_container_width=True, hide_index=True)
+
+    st.markdown("---")
+
     # 4. Scrollable Log Feed
     st.markdown("### 📜 Real-time Event Feed")
     
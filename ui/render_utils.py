@@ -2,6 +2,21 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
+import json
+
+# Streamlit already depends on pyarrow; guard anyway so decoding degrades to JSON
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+COLUMNAR_MEDIA_TYPE = "application/vnd.agentic-bi.columnar+json"
+# Accept header for /ask: Arrow IPC first, then columnar JSON, then plain rows
+RESULT_ACCEPT_HEADER = (
+    f"{ARROW_MEDIA_TYPE}, {COLUMNAR_MEDIA_TYPE};q=0.9, application/json;q=0.5"
+    if pa is not None else f"{COLUMNAR_MEDIA_TYPE}, application/json;q=0.5"
+)
 
 def render_data_results(data, turn_index=0):
     # Display Results (Full Width)
@@ -148,6 +163,10 @@ def render_data_results(data, turn_index=0):
             
     with c2:
         st.dataframe(df, use_container_width=True, height=400)
+        total_rows = data.get("total_rows", len(df))
+        if total_rows > len(df):
+            # Large results are paginated server-side (see /results/{cursor})
+            st.caption(f"Showing first {len(df):,} of {total_rows:,} rows.")
         
     with st.expander("🔍 See Generated SQL & Reasoning"):
         sql_code = data.get("sql", "N/A")
@@ -156,6 +175,9 @@ def render_data_results(data, turn_index=0):
         st.markdown("---")
         st.markdown("**Generated SQL Query:**")
         st.code(sql_code, language="sql")
+        if data.get("sql_params"):
+            # Vault template: slot values bound to the :name placeholders
+            st.caption("Bound parameters: " + ", ".join(f"{k} = {v}" for k, v in data["sql_params"].items()))
         
         if not df.empty:
             st.divider()
@@ -179,3 +201,34 @@ def render_data_results(data, turn_index=0):
                     use_container_width=True,
                     key=f"dl_sql_{turn_index}"
                 )
+
+def iter_sse_events(response):
+    # Parse a Server-Sent Events body (e.g. /ask/stream) into (event, data) pairs
+    event, data_lines = "message", []
+    for line in response.iter_lines(decode_unicode=True):
+        if line is None:
+            continue
+        if line == "":
+            if data_lines:
+                yield event, json.loads("\n".join(data_lines))
+            event, data_lines = "message", []
+        elif line.startswith("event:"):
+            event = line[len("event:"):].strip()
+        elif line.startswith("data:"):
+            data_lines.append(line[len("data:"):].strip())
+
+def decode_ask_response(response):
+    # Decode an /ask (or /results) HTTP response into a dict whose "data" is a
+    # DataFrame, whatever layout the server negotiated
+    content_type = response.headers.get("content-type", "")
+    if content_type.startswith(ARROW_MEDIA_TYPE):
+        table = pa.ipc.open_stream(response.content).read_all()
+        data = json.loads(table.schema.metadata[b"agentic_bi_response"])
+        data["data"] = table.to_pandas()
+        return data
+
+    data = response.json()
+    if data.get("format") == "columnar":
+        cols = data["data"]
+        data["data"] = pd.DataFrame(dict(zip(cols["columns"], cols["values"])), columns=cols["columns"])
+    return data